@@ -0,0 +1,63 @@
+"""Compare looping over code_dicts.articles for every title (the former
+nonfiling_articles) with the precompiled ArticleMatcher, on synthetic
+titles.
+"""
+
+import argparse
+import time
+
+from common import print_table
+from pymarc_helpers.leading_articles import ArticleMatcher
+from pymarc_helpers.code_dicts import articles
+from pymarc_helpers.generator import generate_records
+
+
+def loop(titles):
+    found = 0
+    for title, _ in titles:
+        for article in articles:
+            if title.startswith(article + " "):
+                found += 1
+    return found
+
+
+def matcher(titles, language_aware=False):
+    match = ArticleMatcher().match
+    found = 0
+    for title, language in titles:
+        if match(title, language if language_aware else None):
+            found += 1
+    return found
+
+
+CASES = {
+    "loop over articles": loop,
+    "ArticleMatcher": matcher,
+    "ArticleMatcher, by language":
+    lambda titles: matcher(titles, language_aware=True),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    titles = [(rec["245"]["a"], rec["008"].data[35:38])
+              for rec in generate_records(args.records)]
+    rows = []
+    for case, func in CASES.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            found = func(titles)
+        seconds = (time.perf_counter() - start) / args.repeat
+        rows.append([
+            case, found, f"{seconds / len(titles) * 1e6:.2f}",
+            f"{len(titles) / seconds:.0f}"
+        ])
+    print_table(rows, ["method", "articles found", "us/title", "titles/s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare --run-all without and with --async-pipeline (reading, processing
+and writing overlapping) for one and several workers.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import print_table, scaled_testdata
+
+SCRIPT = """import pymarc_helpers as ph
+
+
+def process_record(rec):
+    for field in rec.get_fields("245", "264", "300"):
+        ph.remove_isbd(field)
+    for field in rec.get_fields("100", "700"):
+        ph.relator_terms_to_codes(field)
+    ph.language_041_from_008(rec)
+    ph.country_044_from_008(rec)
+    return rec
+"""
+
+CASES = {
+    "sequential": [],
+    "async": ["--async-pipeline"],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=100,
+                        help="how often the 72 test records are repeated")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    filename = scaled_testdata(args.copies, "bin", directory)
+    script = os.path.join(directory, "script.py")
+    with open(script, "w") as fh:
+        fh.write(SCRIPT)
+    env = dict(os.environ,
+               PYTHONPATH=os.path.join(os.path.dirname(__file__), os.pardir))
+    try:
+        rows = []
+        for workers in args.workers:
+            for case, options in CASES.items():
+                start = time.perf_counter()
+                subprocess.run([
+                    sys.executable, "-m", "pymarc_helpers.cli", "-i",
+                    filename, "-f", script, "--run-all", "--output-format",
+                    "bin", "-o", "output", "-w",
+                    str(workers)
+                ] + options,
+                               cwd=directory,
+                               env=env,
+                               check=True,
+                               stderr=subprocess.DEVNULL)
+                rows.append(
+                    [case, workers, f"{time.perf_counter() - start:.2f}"])
+        print_table(rows, ["mode", "workers", "seconds"])
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare counting the values of a subfield by re-parsing a MARC file with
+loading the needed columns of a columnar export.
+"""
+
+import argparse
+import collections
+import os
+import tempfile
+import time
+
+from common import print_table, scaled_testdata
+import pymarc_helpers as ph
+from pymarc_helpers.columnar import export_columnar, load_columns
+
+
+def count_from_marc(filename, tag, code):
+    counts = collections.Counter()
+    for record in ph.iter_records(filename):
+        for field in record.get_fields(tag):
+            counts.update(field.get_subfields(code))
+    return counts
+
+
+def count_from_columns(filename, tag, code):
+    columns = load_columns(filename, ["tag", "code", "value"])
+    return collections.Counter(
+        value for row_tag, row_code, value in zip(
+            columns["tag"], columns["code"], columns["value"])
+        if row_tag == tag and row_code == code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=100,
+                        help="how often the 72 test records are repeated")
+    args = parser.parse_args()
+
+    rows = []
+    for form in ("bin", "xml"):
+        filename = scaled_testdata(args.copies, form)
+        fd, colfile = tempfile.mkstemp(suffix=".marccol")
+        os.close(fd)
+        try:
+            start = time.perf_counter()
+            export_columnar(filename, colfile)
+            export_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = count_from_marc(filename, "041", "a")
+            marc_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            counts = count_from_columns(colfile, "041", "a")
+            columns_time = time.perf_counter() - start
+            assert counts == expected
+
+            rows.append([
+                form,
+                f"{os.path.getsize(filename) / 2**20:.1f}",
+                f"{os.path.getsize(colfile) / 2**20:.1f}",
+                f"{export_time:.2f}",
+                f"{marc_time:.2f}",
+                f"{columns_time:.2f}",
+            ])
+        finally:
+            os.remove(filename)
+            os.remove(colfile)
+
+    print_table(rows, [
+        "input", "MARC MB", "columnar MB", "export s", "re-parse s",
+        "columns s"
+    ])
+
+
+if __name__ == "__main__":
+    main()
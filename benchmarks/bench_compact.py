@@ -0,0 +1,65 @@
+"""Compare the memory needed to hold a batch as pymarc.Records and as
+CompactRecords (undecoded, and after decoding every field).
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from common import print_table, scaled_testdata
+import pymarc_helpers as ph
+from pymarc_helpers.compact import iter_compact_records
+
+
+def decode_all(records):
+    for record in records:
+        for field in record.fields:
+            field.data if field.is_control_field() else field.subfields
+    return records
+
+
+CASES = {
+    "pymarc.Record":
+    lambda filename: ph.batch_to_list(filename),
+    "CompactRecord":
+    lambda filename: list(iter_compact_records(filename)),
+    "CompactRecord, decoded":
+    lambda filename: decode_all(list(iter_compact_records(filename))),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=20,
+                        help="how often the 72 test records are repeated")
+    args = parser.parse_args()
+
+    filename = scaled_testdata(args.copies, "bin")
+    try:
+        rows = []
+        for case, load in CASES.items():
+            tracemalloc.start()
+            start = time.perf_counter()
+            records = load(filename)
+            elapsed = time.perf_counter() - start
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rows.append([
+                case,
+                len(records),
+                f"{size / len(records) / 1024:.1f}",
+                f"{elapsed:.2f}",
+            ])
+            del records
+        print(f"{os.path.getsize(filename) / rows[0][1] / 1024:.1f} KB "
+              "per record in transmission format (times under tracemalloc)")
+        print_table(rows, ["representation", "records", "KB/record", "load s"])
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare the throughput of processing records after copy.deepcopy, after
+clone_record, and in place (as --run-all does).
+"""
+
+import argparse
+import copy
+import time
+
+from common import TESTDATA, print_table
+import pymarc_helpers as ph
+
+
+def process_record(rec):
+    """A typical small processing script."""
+    for field in rec.get_fields("245", "300"):
+        ph.remove_isbd(field)
+    ph.language_041_from_008(rec)
+    return rec
+
+
+CASES = {
+    "copy.deepcopy": copy.deepcopy,
+    "clone_record": ph.clone_record,
+    "in place": lambda rec: rec,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=50,
+                        help="how often the 72 test records are processed")
+    args = parser.parse_args()
+
+    records = ph.batch_to_list(TESTDATA)
+    rows = []
+    for case, make_copy in CASES.items():
+        # work on fresh records for every case
+        batch = [ph.clone_record(rec) for rec in records]
+        start = time.perf_counter()
+        for _ in range(args.copies):
+            for rec in batch:
+                process_record(make_copy(rec))
+        elapsed = time.perf_counter() - start
+        rows.append([case, f"{len(records) * args.copies / elapsed:.0f}"])
+    print_table(rows, ["copy", "records/s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare the former remove_isbd (an uncompiled regular expression on every
+subfield code and value) with IsbdNormalizer, on the fields 245, 264 and
+300 of synthetic records.
+"""
+
+import argparse
+import re
+import time
+
+from common import print_table
+import pymarc_helpers as ph
+from pymarc_helpers.generator import generate_records
+from pymarc_helpers.isbd import isbd_normalizer
+
+
+def remove_isbd_before(field):
+    isbd_chars = (".", ",", ":", ";", "/")
+    inlist = [subfield.strip() for subfield in field.subfields]
+    outlist = []
+    for subfield in inlist:
+        if re.search(r'\W[A-Z]\.$', subfield) is not None:
+            outlist.append(subfield)
+        elif subfield.rstrip().endswith(isbd_chars):
+            outlist.append(subfield.rstrip()[:-1].rstrip())
+        else:
+            outlist.append(subfield)
+    field.subfields = outlist
+
+
+def per_field(func):
+
+    def run(fields):
+        for field in fields:
+            func(field)
+
+    return run
+
+
+CASES = {
+    "remove_isbd before": per_field(remove_isbd_before),
+    "remove_isbd": per_field(ph.remove_isbd),
+    "IsbdNormalizer.normalize_fields": isbd_normalizer.normalize_fields,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    records = list(generate_records(args.records))
+    rows = []
+    results = []
+    for case, func in CASES.items():
+        fields = [
+            ph.clone_field(field) for rec in records
+            for field in rec.get_fields("245", "264", "300")
+        ]
+        start = time.perf_counter()
+        func(fields)
+        seconds = time.perf_counter() - start
+        results.append([field.subfields for field in fields])
+        rows.append([
+            case,
+            len(fields), f"{seconds / len(fields) * 1e6:.2f}",
+            f"{len(fields) / seconds:.0f}"
+        ])
+    print_table(rows, ["method", "fields", "us/field", "fields/s"])
+    if any(result != results[0] for result in results):
+        print("The results differ!")
+
+
+if __name__ == "__main__":
+    main()
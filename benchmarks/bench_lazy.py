@@ -0,0 +1,82 @@
+"""Compare reading, processing and writing a binary MARC file with
+pymarc.Records and with lazily decoded CompactRecords, for a script that
+only touches a few fields (245, 300, 008, 041), and for a script that
+changes only some of the records (the rest are passed through unchanged).
+"""
+
+import argparse
+import itertools
+import os
+import tempfile
+import time
+
+from common import print_table, scaled_testdata
+import pymarc_helpers as ph
+from pymarc_helpers.compact import iter_compact_records
+
+
+def process_record(rec):
+    ph.remove_isbd(rec["245"])
+    if rec["300"]:
+        ph.remove_isbd(rec["300"])
+    ph.language_041_from_008(rec)
+    return rec
+
+
+def process_some(rec):
+    # changes the records with a 245 $$b, the others are left unchanged
+    if rec["245"]["b"]:
+        ph.remove_isbd(rec["245"])
+    return rec
+
+
+SCRIPTS = {
+    "all records changed": process_record,
+    "some records changed": process_some,
+}
+
+CASES = {
+    "pymarc.Record": ph.iter_records,
+    "CompactRecord": iter_compact_records,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=50,
+                        help="how often the 72 test records are repeated")
+    args = parser.parse_args()
+
+    filename = scaled_testdata(args.copies, "bin")
+    outdir = tempfile.mkdtemp()
+    try:
+        rows = []
+        for (case, reader), (script, process) in itertools.product(
+                CASES.items(), SCRIPTS.items()):
+            outfile = os.path.join(outdir, "output")
+            start = time.perf_counter()
+            count = sum(1 for _ in reader(filename))
+            read_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            ph.write_to_file((process(rec) for rec in reader(filename)),
+                             outfile, "bin")
+            total_time = time.perf_counter() - start
+            os.remove(outfile + ".mrc")
+            rows.append([
+                case, script, count, f"{count / read_time:.0f}",
+                f"{count / total_time:.0f}"
+            ])
+        print_table(rows, [
+            "records", "script", "count", "read rec/s",
+            "read+process+write rec/s"
+        ])
+    finally:
+        os.remove(filename)
+        os.rmdir(outdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare reading a binary MARC file through a file handle and through the
+memory-mapped reader, with and without decoding the records.
+"""
+
+import argparse
+import os
+import time
+
+import pymarc
+
+from common import print_table, scaled_testdata
+import pymarc_helpers as ph
+
+
+def read_raw(filename):
+    with open(filename, "rb") as fh:
+        return sum(1 for _ in ph.iter_raw_records(fh))
+
+
+def read_pymarc(filename):
+    with open(filename, "rb") as fh:
+        return sum(1 for _ in pymarc.MARCReader(fh))
+
+
+def read_raw_mmap(filename):
+    return sum(1 for _ in ph.iter_mmap_records(filename))
+
+
+def read_records(filename):
+    return sum(1 for _ in ph.iter_records(filename))
+
+
+CASES = {
+    "raw, file handle": read_raw,
+    "raw, mmap": read_raw_mmap,
+    "decoded, MARCReader": read_pymarc,
+    "decoded, mmap (iter_records)": read_records,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=100,
+                        help="how often the 72 test records are repeated")
+    args = parser.parse_args()
+
+    filename = scaled_testdata(args.copies, "bin")
+    try:
+        rows = []
+        for case, read in CASES.items():
+            start = time.perf_counter()
+            count = read(filename)
+            seconds = time.perf_counter() - start
+            rows.append(
+                [case, count, f"{seconds:.3f}", f"{count / seconds:.0f}"])
+        print_table(rows, ["reader", "records", "seconds", "rec/s"])
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
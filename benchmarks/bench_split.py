@@ -0,0 +1,62 @@
+"""Compare splitting a binary MARC file by loading it with batch_to_list and
+calling write_to_file per shard with split_file.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from common import print_table, scaled_testdata
+import pymarc_helpers as ph
+from pymarc_helpers.split import split_file
+
+
+def split_list(filename, parts, outfile_base, form):
+    records = ph.batch_to_list(filename)
+    for number in range(parts):
+        start = len(records) * number // parts
+        end = len(records) * (number + 1) // parts
+        ph.write_to_file(records[start:end], f"{outfile_base}_{number:03d}",
+                         form)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=100,
+                        help="how often the 72 test records are repeated")
+    parser.add_argument("--parts", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    filename = scaled_testdata(args.copies, "bin", directory)
+    outfile_base = os.path.join(directory, "part")
+    cases = {
+        "batch_to_list + write_to_file":
+        lambda form: split_list(filename, args.parts, outfile_base, form),
+        "split_file":
+        lambda form: split_file(filename, args.parts, outfile_base, form),
+        f"split_file, {args.workers} workers":
+        lambda form: split_file(filename, args.parts, outfile_base, form,
+                                workers=args.workers),
+    }
+    try:
+        rows = []
+        for form in ("bin", "xml"):
+            for case, split in cases.items():
+                start = time.perf_counter()
+                split(form)
+                rows.append(
+                    [case, form, f"{time.perf_counter() - start:.3f}"])
+        print_table(rows, ["method", "output", "seconds"])
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare peak RSS and throughput of pymarc.parse_xml_to_array and the
+incremental iter_xml_records reader on a scaled-up MARC-XML file.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import pymarc
+
+from common import peak_rss_kb, print_table, run_isolated, scaled_testdata
+import pymarc_helpers as ph
+
+CASES = {
+    "parse_xml_to_array": pymarc.parse_xml_to_array,
+    "iter_xml_records": ph.iter_xml_records,
+}
+
+
+def run_case(case, filename):
+    """Read the whole file with one of the readers and print the results."""
+    start = time.perf_counter()
+    count = 0
+    for _ in CASES[case](filename):
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps({
+            "case": case,
+            "records": count,
+            "seconds": elapsed,
+            "peak_rss_kb": peak_rss_kb()
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies",
+                        type=int,
+                        default=100,
+                        help="how often the 72 test records are repeated")
+    parser.add_argument("--run", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_case(args.run, args.file)
+        return
+
+    filename = scaled_testdata(args.copies, "xml")
+    try:
+        rows = []
+        for case in CASES:
+            result = run_isolated(__file__, "--run", case, "--file", filename)
+            rows.append([
+                case, result["records"],
+                f'{result["records"] / result["seconds"]:.0f}',
+                f'{result["peak_rss_kb"] / 1024:.1f}'
+            ])
+        print(f"{os.path.getsize(filename) / 2**20:.1f} MB MARC-XML")
+        print_table(rows, ["reader", "records", "records/s", "peak RSS MB"])
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    main()
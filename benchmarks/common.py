@@ -0,0 +1,79 @@
+"""Shared helpers for the benchmark scripts.
+
+The benchmarks are run from the repository root, e.g.
+
+    python benchmarks/bench_xml_reader.py --copies 200
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import pymarc
+
+# make the package importable without installing it
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import pymarc_helpers as ph
+
+TESTDATA = os.path.join(os.path.dirname(__file__), os.pardir, "tests",
+                        "testdata", "bindata_short.mrc")
+
+
+def scaled_testdata(copies, form="bin", directory=None):
+    """Write the test batch `copies` times to a temporary file and return
+    the filename. `form` is "bin" or "xml".
+    """
+    records = ph.batch_to_list(TESTDATA)
+    suffix = ".mrc" if form == "bin" else ".xml"
+    fd, filename = tempfile.mkstemp(suffix=suffix, dir=directory)
+    os.close(fd)
+    with open(filename, "wb") as out:
+        if form == "bin":
+            chunk = b"".join(record.as_marc() for record in records)
+            for _ in range(copies):
+                out.write(chunk)
+        else:
+            writer = pymarc.XMLWriter(out)
+            for _ in range(copies):
+                for record in records:
+                    writer.write(record)
+            writer.close(close_fh=False)
+    return filename
+
+
+def peak_rss_kb(children=False):
+    """Return the peak resident set size of the current process in KB, or
+    of the largest of its terminated child processes.
+    """
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        # bytes on macOS, KB everywhere else
+        peak //= 1024
+    return peak
+
+
+def run_isolated(script, *args):
+    """Run a benchmark script in a fresh interpreter, so peak RSS is measured
+    per case, and return the JSON it prints to stdout.
+    """
+    output = subprocess.run([sys.executable, script, *args],
+                            check=True,
+                            capture_output=True,
+                            text=True).stdout
+    return json.loads(output)
+
+
+def print_table(rows, header):
+    """Print the benchmark results as a simple table."""
+    widths = [
+        max(len(str(row[i])) for row in rows + [header])
+        for i in range(len(header))
+    ]
+    for row in [header] + rows:
+        print("  ".join(str(cell).rjust(width)
+                        for cell, width in zip(row, widths)))
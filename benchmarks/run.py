@@ -0,0 +1,302 @@
+"""Benchmark suite for the helper functions and the CLI modes.
+
+Generates a synthetic MARC file (see pymarc_helpers.generator) and runs
+every case in a fresh interpreter, so the peak memory (RSS) is measured per
+case. Reports records/sec and peak memory for the readers, statistics,
+writers and CLI modes, and the latency per call of the helper functions.
+
+    python benchmarks/run.py --records 100000 --output results.json
+    python benchmarks/run.py --records 100000 --compare results.json
+
+With --compare, the results are compared with an earlier run and the
+command exits with status 1 if a metric got worse by more than
+--threshold (10 % by default).
+"""
+
+import argparse
+import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import peak_rss_kb, print_table, run_isolated
+import pymarc_helpers as ph
+from pymarc_helpers.generator import generate_file
+
+# metrics where higher is better; for all others lower is better
+HIGHER_IS_BETTER = ("records_per_sec", )
+
+SCRIPT = """import pymarc_helpers as ph
+
+
+def process_record(rec):
+    for field in rec.get_fields("245", "264", "300"):
+        ph.remove_isbd(field)
+    for field in rec.get_fields("100", "700"):
+        ph.relator_terms_to_codes(field)
+    ph.nonfiling_articles(rec["245"])
+    ph.language_041_from_008(rec)
+    ph.country_044_from_008(rec)
+    return rec
+"""
+
+
+def _count(records):
+    return sum(1 for _ in records)
+
+
+def _throughput(func, *args):
+    """Run func, which returns the number of records it handled, and return
+    its metrics.
+    """
+    start = time.perf_counter()
+    records = func(*args)
+    seconds = time.perf_counter() - start
+    return {
+        "records_per_sec": records / seconds,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def _getstats(infile):
+    records = ph.batch_to_list(infile)
+    with tempfile.TemporaryDirectory() as directory:
+        ph.getstats(records, os.path.join(directory, "stats.txt"))
+    return len(records)
+
+
+def _write(infile, form):
+    records = ph.batch_to_list(infile)
+    directory = tempfile.mkdtemp()
+    try:
+        return _throughput(_write_records, records,
+                           os.path.join(directory, "output"), form)
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+def _write_records(records, filename, form):
+    ph.write_to_file(records, filename, form)
+    return len(records)
+
+
+def _cli(infile, *options):
+    directory = tempfile.mkdtemp()
+    script = os.path.join(directory, "script.py")
+    with open(script, "w") as fh:
+        fh.write(SCRIPT)
+    env = dict(os.environ,
+               PYTHONPATH=os.path.join(os.path.dirname(__file__), os.pardir))
+    try:
+        start = time.perf_counter()
+        subprocess.run([
+            sys.executable, "-m", "pymarc_helpers.cli", "-i", infile, "-f",
+            script, "--run-all", "--output-format", "bin", "-o", "output",
+            *options
+        ],
+                       cwd=directory,
+                       env=env,
+                       check=True,
+                       stderr=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    # every case runs in a fresh interpreter, so the CLI is the only child
+    return {
+        "records_per_sec": _count(ph.iter_records(infile)) / seconds,
+        "peak_rss_kb": peak_rss_kb(children=True),
+    }
+
+
+# field 245 with the second indicator set, for insert_nonfiling_chars
+def _with_nonfiling(record):
+    record["245"].indicators[1] = "4"
+    record["245"]["a"] = "The " + record["245"]["a"]
+    return record
+
+
+HELPERS = {
+    "remove_isbd": lambda rec: ph.remove_isbd(rec["245"]),
+    "nonfiling_articles": lambda rec: ph.nonfiling_articles(rec["245"]),
+    "insert_nonfiling_chars":
+    lambda rec: ph.insert_nonfiling_chars(_with_nonfiling(rec)["245"]),
+    "relator_terms_to_codes":
+    lambda rec: ph.relator_terms_to_codes(rec["100"]),
+    "language_041_from_008": ph.language_041_from_008,
+    "country_044_from_008": ph.country_044_from_008,
+    "translate_ill": ph.translate_ill,
+    "sort_subfields": lambda rec: ph.sort_subfields(rec["245"].subfields),
+    "change_control_data":
+    lambda rec: ph.change_control_data(rec["008"], "0-5", "200101"),
+}
+
+
+def _helper(infile, name):
+    records = ph.batch_to_list(infile)
+    # the helpers change the records, so every call gets a fresh copy; the
+    # copies are made before timing
+    copies = [ph.clone_record(rec) for rec in records]
+    helper = HELPERS[name]
+    start = time.perf_counter()
+    for rec in copies:
+        helper(rec)
+    seconds = time.perf_counter() - start
+    return {"us_per_call": seconds / len(copies) * 1e6}
+
+
+CASES = {
+    "batch_to_list":
+    lambda infile: _throughput(lambda: len(ph.batch_to_list(infile))),
+    "iter_records":
+    lambda infile: _throughput(lambda: _count(ph.iter_records(infile))),
+    "file_stats":
+    lambda infile: _throughput(lambda: ph.file_stats(infile).records),
+    "getstats": lambda infile: _throughput(lambda: _getstats(infile)),
+    "write_to_file bin": lambda infile: _write(infile, "bin"),
+    "write_to_file xml": lambda infile: _write(infile, "xml"),
+    "write_to_file text": lambda infile: _write(infile, "text"),
+    "cli --run-all": lambda infile: _cli(infile),
+    "cli --run-all --lazy": lambda infile: _cli(infile, "--lazy"),
+    "cli --run-all --async-pipeline":
+    lambda infile: _cli(infile, "--async-pipeline"),
+}
+for _name in HELPERS:
+    CASES[_name] = lambda infile, name=_name: _helper(infile, name)
+
+
+def run_suite(infile, cases, repeat=1):
+    """Run the cases, each in a fresh interpreter, and return the results.
+    With `repeat`, every case is run several times and the best value of
+    every metric is kept, to reduce the noise.
+    """
+    results = {}
+    for case in cases:
+        print(f"{case} ...", file=sys.stderr)
+        runs = [
+            run_isolated(__file__, "--case", case, "--input", infile)
+            for _ in range(repeat)
+        ]
+        results[case] = {
+            metric: (max if metric in HIGHER_IS_BETTER else min)(
+                run[metric] for run in runs)
+            for metric in runs[0]
+        }
+    return results
+
+
+def compare(baseline, results, threshold):
+    """Return a table of the metrics of both runs and the list of the
+    metrics that got worse by more than `threshold` (a fraction).
+    """
+    rows = []
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(case, {}).get(metric)
+            if not old:
+                rows.append([case, metric, "", f"{value:.1f}", "", ""])
+                continue
+            change = (value - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "REGRESSION" if worse > threshold else ""
+            if flag:
+                regressions.append(f"{case}: {metric}")
+            rows.append([
+                case, metric, f"{old:.1f}", f"{value:.1f}", f"{change:+.1%}",
+                flag
+            ])
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--records",
+                        type=int,
+                        default=5000,
+                        help="number of synthetic records")
+    parser.add_argument("--form", choices=["bin", "xml"], default="bin")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat",
+                        type=int,
+                        default=1,
+                        help="run every case N times and keep the best")
+    parser.add_argument("--cases",
+                        nargs="+",
+                        choices=list(CASES),
+                        default=list(CASES),
+                        metavar="CASE",
+                        help="cases to run (default: all)")
+    parser.add_argument("--output", help="write the results to a JSON file")
+    parser.add_argument("--compare",
+                        metavar="BASELINE",
+                        help="compare with the results of an earlier run")
+    parser.add_argument("--threshold",
+                        type=float,
+                        default=0.1,
+                        help="regression threshold as a fraction")
+    # internal: run a single case and print its metrics
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(CASES[args.case](args.input)))
+        return
+
+    directory = tempfile.mkdtemp()
+    try:
+        infile = generate_file(os.path.join(directory, "synthetic"),
+                               args.records, args.form, args.seed)
+        results = run_suite(infile, args.cases, args.repeat)
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {
+                    "meta": {
+                        "records": args.records,
+                        "form": args.form,
+                        "seed": args.seed,
+                        "repeat": args.repeat,
+                        "date": datetime.datetime.now().isoformat(),
+                        "python": platform.python_version(),
+                        "pymarc": importlib.metadata.version("pymarc"),
+                    },
+                    "results": results,
+                },
+                fh,
+                indent=2)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)["results"]
+        rows, regressions = compare(baseline, results, args.threshold)
+        print_table(rows,
+                    ["case", "metric", "baseline", "now", "change", ""])
+        if regressions:
+            print(f"\n{len(regressions)} regressions above "
+                  f"{args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        rows = [[case, metric, f"{value:.1f}"]
+                for case, metrics in results.items()
+                for metric, value in metrics.items()]
+        print_table(rows, ["case", "metric", "value"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,16 @@
 from .pymarc_helpers import *
-from .code_dicts import *
+from . import code_dicts
+from . import pymarc_helpers as _helpers
 
 __version__ = "0.3.0"
+
+# the code tables are exported, too; they are loaded on first use (see
+# code_dicts)
+__all__ = [name for name in dir(_helpers) if not name.startswith("_")
+           ] + code_dicts.__all__
+
+
+def __getattr__(name):
+    if name in code_dicts.NAMES:
+        return getattr(code_dicts, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,194 @@
+"""Run reading, processing and writing as overlapping stages.
+
+The three stages run concurrently on an asyncio event loop and are
+connected by bounded queues: the reader can only get `queue_size` items
+ahead of the processing, and the processing only `queue_size` items ahead
+of the writer, so memory use stays bounded and a slow stage holds back the
+others (backpressure). Reading and writing run in a thread each, the
+processing in an executor, e.g. a ProcessPoolExecutor for several worker
+processes. The order of the items is preserved.
+
+    pipeline = AsyncPipeline(chunked(records, 100), process_chunk,
+                             writer.write_all, executor)
+    pipeline.run()
+    print(pipeline.report())
+"""
+
+import asyncio
+import concurrent.futures
+import time
+
+import texttable as TT
+
+# marks the end of the input in the queues
+_END = object()
+
+
+def _timed_call(func, *args):
+    """Return func(*args) and the time it took. Runs in the executor."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class StageStats:
+    """Items, records and busy time of a stage, and the depth of the queue
+    it takes its input from (sampled whenever an item is put in).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.records = 0
+        self.seconds = 0.0
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._depth_samples = 0
+
+    def add(self, records, seconds):
+        self.items += 1
+        self.records += records
+        self.seconds += seconds
+
+    def sample_queue(self, queue):
+        depth = queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_sum += depth
+        self._depth_samples += 1
+
+    def mean_depth(self):
+        if not self._depth_samples:
+            return 0.0
+        return self._depth_sum / self._depth_samples
+
+    def records_per_second(self):
+        """Throughput while the stage was busy, or None if unknown."""
+        if not self.seconds:
+            return None
+        return self.records / self.seconds
+
+
+class AsyncPipeline:
+    """Read items from an iterable, apply `process` to them in `executor`
+    and pass the results to `write`.
+
+    The items are usually chunks of records and must not be None. `process`
+    has to be picklable if the executor is a ProcessPoolExecutor. `size`
+    returns the number of records in an item for the report (len by
+    default).
+    """
+
+    def __init__(self, items, process, write, executor, queue_size=8,
+                 size=len):
+        self.items = items
+        self.process = process
+        self.write = write
+        self.executor = executor
+        self.queue_size = queue_size
+        self.size = size
+        self.stages = [
+            StageStats("read"),
+            StageStats("process"),
+            StageStats("write")
+        ]
+        self.seconds = 0.0
+
+    def run(self):
+        """Run the pipeline until all items are written."""
+        start = time.perf_counter()
+        try:
+            asyncio.run(self._run())
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    async def _run(self):
+        read_stats, process_stats, write_stats = self.stages
+        process_queue = asyncio.Queue(self.queue_size)
+        write_queue = asyncio.Queue(self.queue_size)
+        # separate threads, so reading and writing overlap
+        with concurrent.futures.ThreadPoolExecutor(
+                2, thread_name_prefix="pipeline-io") as io_executor:
+            tasks = [
+                asyncio.ensure_future(coro) for coro in (
+                    self._read(io_executor, process_queue, read_stats,
+                               process_stats),
+                    self._submit(process_queue, write_queue, write_stats),
+                    self._write(io_executor, write_queue, process_stats,
+                                write_stats),
+                )
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def _read(self, io_executor, queue, stats, next_stats):
+        loop = asyncio.get_running_loop()
+        items = iter(self.items)
+        while True:
+            item, seconds = await loop.run_in_executor(
+                io_executor, _timed_call, next, items, None)
+            if item is None:
+                break
+            stats.add(self.size(item), seconds)
+            await queue.put(item)
+            next_stats.sample_queue(queue)
+        await queue.put(_END)
+
+    async def _submit(self, in_queue, out_queue, next_stats):
+        # hands the items to the executor right away; the bounded out_queue
+        # limits how many are processed at a time, the writer awaits them in
+        # order
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await in_queue.get()
+            if item is _END:
+                break
+            future = loop.run_in_executor(self.executor, _timed_call,
+                                          self.process, item)
+            await out_queue.put((future, self.size(item)))
+            next_stats.sample_queue(out_queue)
+        await out_queue.put(_END)
+
+    async def _write(self, io_executor, queue, process_stats, stats):
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await queue.get()
+            if entry is _END:
+                break
+            future, records = entry
+            result, seconds = await future
+            process_stats.add(records, seconds)
+            _, seconds = await loop.run_in_executor(io_executor, _timed_call,
+                                                    self.write, result)
+            stats.add(records, seconds)
+
+    def report(self):
+        """Return the throughput and queue depths of the stages as a table.
+
+        The queue of a stage is the one it takes its input from; for the
+        process stage it holds the read items, for the write stage the
+        submitted ones.
+        """
+        table = TT.Texttable()
+        table.header([
+            "Stage", "Items", "Records", "Busy seconds", "Records/sec",
+            "Max queue", "Mean queue"
+        ])
+        table.set_deco(TT.Texttable.HEADER)
+        table.set_cols_dtype(["t", "i", "i", "f", "t", "i", "f"])
+        table.set_cols_align(["l", "r", "r", "r", "r", "r", "r"])
+        table.set_precision(3)
+        for stage in self.stages:
+            rate = stage.records_per_second()
+            table.add_row([
+                stage.name, stage.items, stage.records, stage.seconds,
+                "" if rate is None else f"{rate:.0f}", stage.max_depth,
+                stage.mean_depth()
+            ])
+        records = self.stages[-1].records
+        total = f"Total: {records} records in {self.seconds:.3f} seconds"
+        if self.seconds:
+            total += f" ({records / self.seconds:.0f} records/sec)"
+        return table.draw() + "\n" + total
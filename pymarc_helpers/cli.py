@@ -1,15 +1,27 @@
 #!/usr/bin/env python3
 
 import argparse
+import collections
+import concurrent.futures
+import functools
 import sys
-import copy
+import itertools
+import multiprocessing
 import os
 import subprocess
 import difflib
 import textwrap
 from runpy import run_path
-from pymarc_helpers import *
+from pymarc_helpers.pymarc_helpers import *
 from pymarc_helpers import __version__
+from pymarc_helpers.leading_articles import article_matcher
+from pymarc_helpers.async_pipeline import AsyncPipeline
+from pymarc_helpers.compact import iter_compact_records
+from pymarc_helpers.index import random_sample
+from pymarc_helpers.instrument import Instrumentation
+from pymarc_helpers.merge import DEDUPE_KEYS, KEEP, merge_files
+from pymarc_helpers.relators import relator_resolver
+from pymarc_helpers.split import SPLIT_BY, split_file
 
 diff_template = """<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
           "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
@@ -104,12 +116,33 @@ parser.add_argument("-s",
                     action="store_true",
                     help="Print field stats of input and exit.")
 
+parser.add_argument(
+    "--stats-format",
+    choices=["table", "json", "csv"],
+    default="table",
+    help="""Format of the field stats: human readable tables, JSON or CSV.
+    Defaults to table.""")
+
 parser.add_argument(
     "--run-test",
     action="store_true",
     help=
     """Output a sample of the first 20 records (or all if there are less than 20
-    records) data raw and cooked to separate text files.""")
+    records, see --sample-size) data raw and cooked to separate text files.""")
+
+parser.add_argument(
+    "--sample-size",
+    metavar="N",
+    type=int,
+    default=20,
+    help="Number of records in the sample for --run-test and --diff.")
+
+parser.add_argument(
+    "--random-sample",
+    action="store_true",
+    help="""Use a random sample instead of the first records for --run-test and
+    --diff. For binary input, a byte-offset index (INPUT_FILE.idx) is built on
+    first use.""")
 
 parser.add_argument(
     "--run-all",
@@ -131,32 +164,276 @@ parser.add_argument(
     (xml), or MARCBreaker (text) for human consumption. If not specified, xml is
     used.""")
 
-# Get the args from the parser.
-args = parser.parse_args()
+parser.add_argument(
+    "--split",
+    metavar="N",
+    type=int,
+    help="""Split the input file into N shards in --output-format, named
+    OUTPUT_FILE_000, OUTPUT_FILE_001 etc. Binary input is split into
+    contiguous ranges, in parallel with --workers; binary output copies the
+    records without decoding them.""")
+
+parser.add_argument(
+    "--split-by",
+    choices=SPLIT_BY,
+    default="count",
+    help="""Balance the shards of --split by number of records (count) or by
+    size (bytes, binary input only). Defaults to count.""")
+
+parser.add_argument(
+    "--merge",
+    metavar="FILE",
+    nargs="+",
+    help="""Merge the input file and these files (binary or xml) into the
+    output file in --output-format, removing duplicate records (see
+    --dedupe-key and --keep). Only the keys and positions of the records are
+    held in memory.""")
+
+parser.add_argument(
+    "--dedupe-key",
+    choices=DEDUPE_KEYS,
+    default="001",
+    help="""Records with the same control number (001) or system number (the
+    first 035 $a) are duplicates for --merge. Records without it are always
+    kept. Defaults to 001.""")
+
+parser.add_argument(
+    "--keep",
+    choices=KEEP,
+    default="first",
+    help="""Which of the duplicates --merge keeps: the first, the last, or the
+    one with the most subfields. Defaults to first.""")
+
+parser.add_argument(
+    "--lazy",
+    action="store_true",
+    help="""Read binary input for --run-all as compact records that decode a
+    field only when the processing script accesses it. Records and fields
+    the script doesn't change are written by copying their original bytes
+    (after checking the record like the normal reader does), and the number
+    of modified records is reported at the end. This only works for binary
+    input: XML input is converted to compact records, which are always
+    written anew and not counted as modified. Without --lazy, every record
+    is written anew and no modified count is reported. The records support
+    the parts of the pymarc.Record interface the helper functions use (see
+    pymarc_helpers.compact).""")
+
+parser.add_argument(
+    "-w",
+    "--workers",
+    metavar="N",
+    type=int,
+    default=1,
+    help="""Number of worker processes for --run-all, --stats and --split.
+    Each worker loads the processing script once. The order of the records is
+    preserved. Defaults to 1 (no worker processes).""")
+
+parser.add_argument(
+    "--async-pipeline",
+    action="store_true",
+    help="""Run --run-all as a pipeline whose stages (reading, processing and
+    writing) run at the same time, connected by bounded queues. Processing
+    runs in a thread, or in --workers processes. A report with the
+    throughput of every stage and the queue depths is printed to stderr at
+    the end.""")
+
+parser.add_argument(
+    "--queue-size",
+    metavar="N",
+    type=int,
+    default=8,
+    help="""Maximum number of chunks (of 100 records) waiting between two
+    stages of --async-pipeline. Defaults to 8.""")
+
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="""Time every helper function call and process_record and print a
+    summary to stderr at the end of the run. Implies --workers 1.""")
+
+parser.add_argument(
+    "--profile-output",
+    metavar="PROFILE_FILE",
+    type=str,
+    help="""Also profile the run with cProfile and write the stats to
+    PROFILE_FILE (see the pstats module). Implies --profile.""")
+
 
-# import the process_record-function
-if args.script_file:
-    script = run_path(args.script_file)
-    process_record = script["process_record"]
-else:
-    print("No processing script specified. Using empty Dummy-Function.")
+def load_process_record(script_file=None):
+    """Return the function 'process_record' from a processing script. If no
+    script is given, return a dummy function that leaves the records as they
+    are.
+    """
+    if script_file:
+        script = run_path(script_file)
+        return script["process_record"]
 
     def process_record(rec):
         return rec
 
+    return process_record
+
+
+# the process_record-function of a worker process, see _init_worker
+_worker_process_record = None
+
+
+def _init_worker(script_file):
+    """Load the processing script once per worker process."""
+    global _worker_process_record
+    _worker_process_record = load_process_record(script_file)
+
+
+def _process_chunk(chunk):
+    """_process_records with the process_record-function of a worker
+    process.
+    """
+    return _process_records(_worker_process_record, chunk)
+
+
+def _process_records(process_record, chunk):
+    """Apply process_record to a list of (index, record)-tuples.
+
+    Return a list of (index, record, error)-tuples and the unknown relator
+    terms found in the chunk. If processing a record fails, record is None
+    and error a description of the failure, so one bad record doesn't kill
+    the run. Broken input records (None) are reported as failures, too.
+    """
+    results = []
+    for idx, rec in chunk:
+        if rec is None:
+            results.append((idx, None, "broken record"))
+            continue
+        try:
+            results.append((idx, process_record(rec), None))
+        except Exception as exc:
+            results.append((idx, None,
+                            f"control number {control_number(rec)}: "
+                            f"{type(exc).__name__}: {exc}"))
+    unknown_relators = relator_resolver.unknown.copy()
+    relator_resolver.unknown.clear()
+    return results, unknown_relators
+
+
+def process_parallel(records, script_file, workers, chunksize=100):
+    """Process records in a pool of worker processes and yield the results in
+    the original order.
+
+    Records are sent to the workers in chunks of `chunksize`. At most two
+    chunks per worker are in flight at any time, so the input is streamed
+    instead of being read into memory at once. Failed records are reported on
+    stderr with their index and control number and left out of the output.
+    """
+    with multiprocessing.Pool(workers,
+                              initializer=_init_worker,
+                              initargs=(script_file, )) as pool:
+        for results, unknown_relators in imap_bounded(
+                pool, _process_chunk, chunked(enumerate(records), chunksize),
+                2 * workers):
+            # collect the unknown relator terms of all workers
+            relator_resolver.unknown.update(unknown_relators)
+            yield from _successful(results)
+
+
+def process_serial(records, process_record, chunksize=100):
+    """Process records in this process and yield the results, reporting
+    failed and broken records like process_parallel.
+    """
+    for chunk in chunked(enumerate(records), chunksize):
+        results, unknown_relators = _process_records(process_record, chunk)
+        # _process_records hands the unknown relator terms over
+        relator_resolver.unknown.update(unknown_relators)
+        yield from _successful(results)
+
+
+def _successful(results):
+    """Yield the records of the results of _process_records and report the
+    failures on stderr.
+    """
+    for idx, rec, error in results:
+        if error is None:
+            yield rec
+        else:
+            print(f"Processing record {idx} failed ({error})", file=sys.stderr)
+
+
+def process_async(records, process_record, write, script_file=None,
+                  workers=1, queue_size=8, chunksize=100):
+    """Process records in an AsyncPipeline, so reading, processing and
+    writing overlap, and pass the processed records to `write` in chunks.
+    Return the pipeline for its report.
+
+    With one worker, process_record is applied in a thread, otherwise in
+    worker processes that load the script. Failed records are reported and
+    left out as in process_parallel.
+    """
+    if workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(script_file, ))
+        process = _process_chunk
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        process = functools.partial(_process_records, process_record)
 
-def get_sample(inlist):
-    """Return a sample of 20 records, or all records if the inlist is shorter than 20."""
+    # only the processing touches relator_resolver.unknown during the run
+    unknown_relators = collections.Counter()
 
-    if len(inlist) > 20:
-        sample = [copy.deepcopy(rec) for rec in inlist[:20]]
-    else:
-        sample = [copy.deepcopy(rec) for rec in inlist]
+    def write_results(output):
+        results, unknown = output
+        unknown_relators.update(unknown)
+        write(_successful(results))
+
+    with executor:
+        pipeline = AsyncPipeline(chunked(enumerate(records), chunksize),
+                                 process, write_results, executor,
+                                 queue_size)
+        pipeline.run()
+    relator_resolver.unknown.update(unknown_relators)
+    return pipeline
+
+
+class RunCounter:
+    """Count the records passing through a run, and the modified ones if the
+    records track their changes (see pymarc_helpers.compact). Records
+    converted from XML don't, so there is no modified count for XML input.
+    """
 
-    return sample
+    def __init__(self):
+        self.records = 0
+        self.modified = None
 
+    def count(self, records):
+        """Yield the records, counting them."""
+        for rec in records:
+            self.records += 1
+            if rec is not None and hasattr(
+                    rec, "tracks_changes") and rec.tracks_changes():
+                self.modified = (self.modified or 0) + rec.is_modified()
+            yield rec
 
-def diff(inlist):
+    def summary(self):
+        if self.modified is None:
+            return f"{self.records} records processed"
+        return f"{self.records} records processed, {self.modified} modified"
+
+
+def get_sample(records, size=20):
+    """Return a sample of the first `size` records, or all records if there
+    are less. Takes any iterable of records, so only the sample is read
+    from a stream.
+    """
+
+    return [clone_record(rec) for rec in itertools.islice(records, size)]
+
+
+def read_sample(infile, size=20, randomize=False):
+    """Return the sample for --run-test and --diff from a MARC file."""
+    if randomize:
+        return get_sample(random_sample(infile, size), size)
+    return get_sample(iter_records(infile), size)
+
+
+def diff(inlist, process_record):
     """Return a html-Diff of all records in a batch, before and after processing"""
     diff_table = ""
 
@@ -185,9 +462,11 @@ def diff(inlist):
         return pretty_record
 
     for rec in inlist:
-        before = prettify_subfields(copy.deepcopy(rec)).split("\n")
+        # prettify_subfields doesn't change the record, so only the processed
+        # record needs to be a copy
+        before = prettify_subfields(rec).split("\n")
         after = prettify_subfields(process_record(
-            copy.deepcopy(rec))).split("\n")
+            clone_record(rec))).split("\n")
 
         diff_table += d.make_table(before, after)
 
@@ -198,6 +477,29 @@ def diff(inlist):
 
 def main():
 
+    # Get the args from the parser.
+    args = parser.parse_args()
+
+    instrumentation = None
+    if args.profile or args.profile_output:
+        if args.workers > 1:
+            print("Profiling runs in a single process, ignoring --workers.",
+                  file=sys.stderr)
+            args.workers = 1
+        # the helpers have to be wrapped before the script imports them
+        instrumentation = Instrumentation(args.profile_output)
+        instrumentation.install()
+
+    # import the process_record-function
+    if not args.script_file:
+        # stderr, so it doesn't end up in JSON or CSV stats on stdout
+        print("No processing script specified. Using empty Dummy-Function.",
+              file=sys.stderr)
+    process_record = load_process_record(args.script_file)
+    if instrumentation is not None:
+        process_record = instrumentation.wrap_process_record(process_record)
+        instrumentation.start()
+
     # name the output file
     if args.output_file:
         outfile = args.output_file
@@ -210,17 +512,34 @@ def main():
         outfile_base = input_file_tail[:extension_idx]
         outfile = f"{outfile_base}_output"
 
-    inlist = batch_to_list(args.input_file)
-
     if args.stats:
         # print stats
-        print(getstats(inlist))
+        getstats(file_stats(args.input_file, args.workers),
+                 form=args.stats_format)
+
+    if args.split:
+        for filename, count in split_file(args.input_file, args.split,
+                                          outfile_base, args.output_format,
+                                          args.split_by, args.workers):
+            print(f"{filename}: {count} records", file=sys.stderr)
+
+    if args.merge:
+        counts = merge_files([args.input_file] + args.merge,
+                             f"{outfile_base}_merged", args.output_format,
+                             args.dedupe_key, args.keep)
+        print(
+            f"{counts['read']} records read, {counts['written']} written, "
+            f"{counts['duplicates']} duplicates removed, "
+            f"{counts['without key']} without key, "
+            f"{counts['broken']} broken",
+            file=sys.stderr)
 
     if args.run_test:
         # make a test run and write to output files
 
         # get the sample
-        sample = get_sample(inlist)
+        sample = read_sample(args.input_file, args.sample_size,
+                             args.random_sample)
         # write the sample to files
         write_to_file([rec for rec in sample], f"{outfile_base}_sample_raw",
                       "text")
@@ -228,20 +547,54 @@ def main():
                       f"{outfile_base}_sample_cooked", "text")
 
     if args.run_all:
-        write_to_file([process_record(copy.deepcopy(rec)) for rec in inlist],
-                      outfile_base, args.output_format)
+        # stream the records through, so the batch is never held in memory;
+        # the original records are never used again, so they are processed
+        # in place
+        if args.lazy:
+            records = iter_compact_records(args.input_file)
+        else:
+            records = iter_records(args.input_file)
+        counter = RunCounter()
+        if args.async_pipeline:
+            with RecordWriter(outfile_base, args.output_format) as writer:
+                pipeline = process_async(
+                    records, process_record,
+                    lambda chunk: writer.write_all(counter.count(chunk)),
+                    args.script_file, args.workers, args.queue_size)
+            print(pipeline.report(), file=sys.stderr)
+        else:
+            if args.workers > 1:
+                processed = process_parallel(records, args.script_file,
+                                             args.workers)
+            else:
+                processed = process_serial(records, process_record)
+            write_to_file(counter.count(processed), outfile_base,
+                          args.output_format)
+        print(counter.summary(), file=sys.stderr)
 
     if args.diff:
         diff_file = f"{outfile_base}_diff.html"
         # need to specify encoding lest it fails on Windows
         with open(diff_file, "w", encoding="utf-8", newline="") as fh:
-            fh.write(diff(get_sample(inlist)))
+            fh.write(
+                diff(
+                    read_sample(args.input_file, args.sample_size,
+                                args.random_sample), process_record))
         if sys.platform == "win32":
             os.startfile(diff_file)
         else:
             opener = "open" if sys.platform == "darwin" else "xdg-open"
             subprocess.call([opener, diff_file])
 
+    if relator_resolver.unknown:
+        print(relator_resolver.report(), file=sys.stderr)
+
+    if instrumentation is not None:
+        instrumentation.stop()
+        print(instrumentation.summary(), file=sys.stderr)
+        if article_matcher.applied:
+            print("\n" + article_matcher.report(), file=sys.stderr)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,116 @@
+"""Columnar export of MARC files.
+
+The records are flattened into rows with the columns in COLUMNS: one row per
+subfield, one per control field (with an empty subfield code) and one for
+the leader (tag "LDR"). The rows are written in chunks of records to a ZIP
+archive, with every column of every chunk compressed as a separate member.
+Loading only some columns therefore only reads and decompresses those
+members:
+
+    export_columnar("batch.mrc", "batch.marccol")
+    columns = load_columns("batch.marccol", ["tag", "code", "value"])
+"""
+
+import json
+import zipfile
+
+from pymarc_helpers.pymarc_helpers import control_number, iter_records
+
+COLUMNS = ("record", "id", "tag", "ind1", "ind2", "code", "value")
+FORMAT_VERSION = 1
+
+
+def flatten_record(record, number):
+    """Yield the rows of a record as tuples in the order of COLUMNS.
+    `number` is the position of the record in the file.
+    """
+    record_id = control_number(record) or ""
+    yield (number, record_id, "LDR", "", "", "", str(record.leader))
+    for field in record.fields:
+        if field.is_control_field():
+            yield (number, record_id, field.tag, "", "", "", field.data)
+        else:
+            ind1, ind2 = field.indicators[0], field.indicators[1]
+            subfields = field.subfields
+            for i in range(0, len(subfields), 2):
+                yield (number, record_id, field.tag, ind1, ind2,
+                       subfields[i], subfields[i + 1])
+
+
+def _member(chunk, column):
+    return f"chunk-{chunk:06d}/{column}.json"
+
+
+def export_columnar(infile, outfile, chunk_size=10000):
+    """Flatten the records of a marc-file (binary or xml) and write them to
+    a columnar file in chunks of `chunk_size` records. Return the number of
+    records.
+    """
+    chunks = 0
+    records = 0
+    with zipfile.ZipFile(outfile, "w", zipfile.ZIP_DEFLATED) as archive:
+
+        def write_chunk(rows):
+            for column, values in zip(COLUMNS, zip(*rows)):
+                archive.writestr(_member(chunks, column),
+                                 json.dumps(values, ensure_ascii=False))
+
+        rows = []
+        for record in iter_records(infile):
+            if record is None:
+                continue
+            rows.extend(flatten_record(record, records))
+            records += 1
+            if records % chunk_size == 0:
+                write_chunk(rows)
+                chunks += 1
+                rows = []
+        if rows:
+            write_chunk(rows)
+            chunks += 1
+
+        archive.writestr(
+            "meta.json",
+            json.dumps({
+                "version": FORMAT_VERSION,
+                "columns": COLUMNS,
+                "chunks": chunks,
+                "records": records,
+            }))
+    return records
+
+
+def read_meta(path):
+    """Return the metadata of a columnar file."""
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read("meta.json"))
+
+
+def iter_column_chunks(path, columns=None):
+    """Yield a dict with the requested columns (all by default) for every
+    chunk of a columnar file. Only the requested columns are read.
+    """
+    with zipfile.ZipFile(path) as archive:
+        meta = json.loads(archive.read("meta.json"))
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version: {meta['version']}")
+        columns = columns or meta["columns"]
+        for column in columns:
+            if column not in meta["columns"]:
+                raise ValueError(f"Unknown column: {column}")
+        for chunk in range(meta["chunks"]):
+            yield {
+                column: json.loads(archive.read(_member(chunk, column)))
+                for column in columns
+            }
+
+
+def load_columns(path, columns=None):
+    """Return a dict with the requested columns (all by default) of a
+    columnar file as lists.
+    """
+    loaded = {column: [] for column in columns or COLUMNS}
+    for chunk in iter_column_chunks(path, columns):
+        for column, values in chunk.items():
+            loaded[column].extend(values)
+    return loaded
@@ -0,0 +1,509 @@
+"""Compact record representation for bulk processing.
+
+CompactRecord and CompactField use __slots__ and keep the data of every
+field as a slice of the raw bytes of the record in transmission format. A
+field is only decoded when its data, indicators or subfields are first
+accessed; tags and subfield codes are interned. They provide the parts of
+the pymarc.Record and pymarc.Field interfaces the helpers in pymarc_helpers
+use, so
+
+    for record in iter_compact_records("batch.mrc"):
+        remove_isbd(record["245"])
+        language_041_from_008(record)
+
+works as with pymarc records. Convert to pymarc.Record with to_record (and
+back with CompactRecord.from_record) where the full pymarc API is needed.
+
+Changes to records and fields read from transmission format are tracked.
+Unmodified records and fields are written back by copying their original
+bytes (see CompactRecord.as_marc), so reading and writing a record that a
+script only partly looks at or leaves unchanged costs little more than
+copying it. Records are checked when they are read (see
+CompactRecord.from_marc), so only valid records are copied. Records
+converted with from_record (e.g. from XML) and pymarc.Records don't track
+their changes and are always encoded anew.
+"""
+
+import sys
+
+import pymarc
+from pymarc.constants import END_OF_FIELD, END_OF_RECORD, SUBFIELD_INDICATOR
+
+from pymarc_helpers.pymarc_helpers import (is_xml, iter_mmap_records,
+                                           iter_xml_records)
+
+LEADER_LEN = 24
+DIRECTORY_ENTRY_LEN = 12
+_subfield_indicator = SUBFIELD_INDICATOR.encode("ascii")
+_end_of_field = END_OF_FIELD.encode("ascii")
+_end_of_record = END_OF_RECORD.encode("ascii")
+
+
+class TrackedList(list):
+    """A list that tells its owner when its content changes."""
+
+    __slots__ = ("_owner", )
+
+    def __init__(self, iterable=(), owner=None):
+        super().__init__(iterable)
+        self._owner = owner
+
+    def _changed(self):
+        # no owner yet while a pickled list is restored
+        owner = getattr(self, "_owner", None)
+        if owner is not None:
+            owner._mark_dirty()
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = list(value)
+        try:
+            unchanged = super().__getitem__(key) == value
+        except IndexError:
+            unchanged = False
+        super().__setitem__(key, value)
+        if not unchanged:
+            self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __iadd__(self, other):
+        result = super().__iadd__(other)
+        self._changed()
+        return result
+
+    def __imul__(self, other):
+        result = super().__imul__(other)
+        self._changed()
+        return result
+
+    def append(self, item):
+        super().append(item)
+        self._changed()
+
+    def extend(self, iterable):
+        super().extend(iterable)
+        self._changed()
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self._changed()
+
+    def pop(self, *args):
+        item = super().pop(*args)
+        self._changed()
+        return item
+
+    def remove(self, item):
+        super().remove(item)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        before = list(self)
+        super().sort(*args, **kwargs)
+        if before != self:
+            self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+
+class CompactField:
+    """A field that is decoded from the raw bytes of its record on first
+    access.
+    """
+
+    __slots__ = ("_tag", "_raw", "_start", "_end", "_marc8", "_data",
+                 "_indicators", "_subfields", "_dirty")
+
+    def __init__(self, tag, indicators=None, subfields=None, data=""):
+        """Same arguments as pymarc.Field."""
+        self._tag = sys.intern(tag)
+        self._raw = None
+        self._start = self._end = 0
+        self._marc8 = False
+        self._dirty = False
+        if self.is_control_field():
+            self._data = data
+            self._indicators = None
+            self._subfields = None
+        else:
+            self._data = None
+            self._indicators = TrackedList(
+                (str(x) for x in (indicators or [])), self)
+            self._subfields = TrackedList(subfields or [], self)
+
+    @classmethod
+    def from_marc(cls, tag, raw, marc8=False, start=0, end=None):
+        """Create a field from its data in transmission format, without the
+        field terminator: raw[start:end]. `raw` is usually the whole record,
+        which is shared by its fields. `marc8` tells if the record is MARC-8
+        encoded (leader/09 blank) instead of UTF-8.
+        """
+        field = cls.__new__(cls)
+        field._tag = sys.intern(tag)
+        field._raw = raw
+        field._start = start
+        field._end = len(raw) if end is None else end
+        field._marc8 = marc8
+        field._data = None
+        field._indicators = None
+        field._subfields = None
+        field._dirty = False
+        return field
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    def is_decoded(self):
+        """Return True if the field data has been decoded."""
+        return self._raw is None or self._data is not None or (
+            self._subfields is not None)
+
+    def is_modified(self):
+        """Return True if the field was changed since it was read, or was not
+        read from a record in transmission format at all.
+        """
+        return self._raw is None or self._dirty
+
+    def _decode(self):
+        raw = bytes(self._raw[self._start:self._end])
+        if self.is_control_field():
+            # pymarc decodes control fields of MARC-8 records as latin-1
+            self._data = raw.decode("iso8859-1" if self._marc8 else "utf-8")
+            return
+
+        subs = raw.split(_subfield_indicator)
+        indicators = subs[0].decode("ascii")
+        # missing indicators are blanks, more than two are dropped
+        indicators = (indicators + "  ")[:2]
+        self._indicators = TrackedList(indicators, self)
+        subfields = TrackedList((), self)
+        for subfield in subs[1:]:
+            if not subfield:
+                continue
+            code = sys.intern(subfield[0:1].decode("ascii"))
+            if self._marc8:
+                value = pymarc.marc8_to_unicode(subfield[1:])
+            else:
+                value = subfield[1:].decode("utf-8")
+            list.append(subfields, code)
+            list.append(subfields, value)
+        self._subfields = subfields
+
+    @property
+    def tag(self):
+        return self._tag
+
+    @tag.setter
+    def tag(self, value):
+        if value != self._tag:
+            self._dirty = True
+        self._tag = value
+
+    @property
+    def data(self):
+        if self._data is None and self._raw is not None:
+            self._decode()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        if value != self.data:
+            self._dirty = True
+        self._data = value
+
+    @property
+    def indicators(self):
+        if self._indicators is None:
+            self._decode()
+        return self._indicators
+
+    @indicators.setter
+    def indicators(self, value):
+        if value != self.indicators:
+            self._dirty = True
+        self._indicators = TrackedList(value, self)
+
+    @property
+    def subfields(self):
+        if self._subfields is None:
+            self._decode()
+        return self._subfields
+
+    @subfields.setter
+    def subfields(self, value):
+        if value != self.subfields:
+            self._dirty = True
+        self._subfields = TrackedList(value, self)
+
+    def __iter__(self):
+        """Iterate over (code, value)-tuples like pymarc.Field."""
+        if self.is_control_field():
+            return
+        subfields = self.subfields
+        for i in range(0, len(subfields), 2):
+            yield subfields[i], subfields[i + 1]
+
+    def raw_marc(self):
+        """Return the field in transmission format: the original bytes if the
+        field was not modified, otherwise None.
+        """
+        if self.is_modified():
+            return None
+        return bytes(self._raw[self._start:self._end]) + _end_of_field
+
+    def to_field(self):
+        """Return the field as a pymarc.Field."""
+        if self.is_control_field():
+            return pymarc.Field(tag=self.tag, data=self.data)
+        return pymarc.Field(tag=self.tag,
+                            indicators=list(self.indicators),
+                            subfields=list(self.subfields))
+
+    # the rest of the pymarc.Field interface works on top of the above
+    __str__ = pymarc.Field.__str__
+    __getitem__ = pymarc.Field.__getitem__
+    __setitem__ = pymarc.Field.__setitem__
+    __contains__ = pymarc.Field.__contains__
+    value = pymarc.Field.value
+    get_subfields = pymarc.Field.get_subfields
+    add_subfield = pymarc.Field.add_subfield
+    delete_subfield = pymarc.Field.delete_subfield
+    subfields_as_dict = pymarc.Field.subfields_as_dict
+    is_control_field = pymarc.Field.is_control_field
+    is_subject_field = pymarc.Field.is_subject_field
+    linkage_occurrence_num = pymarc.Field.linkage_occurrence_num
+    format_field = pymarc.Field.format_field
+    as_marc = pymarc.Field.as_marc
+    indicator1 = pymarc.Field.indicator1
+    indicator2 = pymarc.Field.indicator2
+
+
+def _same_field(new, old):
+    """Return True if `new` is `old` or an unmodified copy of it (see
+    pymarc_helpers.clone_record).
+    """
+    if new is old:
+        return True
+    return (isinstance(new, CompactField) and isinstance(old, CompactField)
+            and not new.is_modified() and not old.is_modified()
+            and new._raw is old._raw and new._start == old._start)
+
+
+class CompactRecord:
+    """A record with CompactFields, see the module docstring.
+
+    Changes to the leader, the list of fields and the fields themselves are
+    tracked, see is_modified.
+    """
+
+    __slots__ = ("_leader", "_fields", "force_utf8", "_raw", "_dirty")
+
+    def __init__(self, leader=" " * LEADER_LEN, fields=None):
+        self._leader = leader
+        self._fields = TrackedList(fields or (), self)
+        self.force_utf8 = False
+        self._raw = None
+        self._dirty = False
+
+    @classmethod
+    def from_marc(cls, raw):
+        """Create a record from a record in transmission format. Only the
+        leader and the directory are parsed, but the record is checked like
+        decode_record does: the record length, the end of record, the
+        directory and, for UTF-8 records, the encoding. MARC-8 records are
+        only converted when a field is decoded, so their data isn't checked
+        before.
+        """
+        leader = bytes(raw[:LEADER_LEN]).decode("ascii")
+        if len(leader) != LEADER_LEN:
+            raise pymarc.exceptions.RecordLeaderInvalid
+        if raw[-1:] != _end_of_record:
+            raise pymarc.exceptions.EndOfRecordNotFound
+        try:
+            record_length = int(leader[:5])
+        except ValueError:
+            raise pymarc.exceptions.RecordLengthInvalid
+        if record_length != len(raw):
+            raise pymarc.exceptions.RecordLengthInvalid
+        base_address = int(leader[12:17])
+        if base_address <= 0 or base_address >= len(raw):
+            raise pymarc.exceptions.BaseAddressInvalid
+        directory = bytes(raw[LEADER_LEN:base_address - 1])
+        marc8 = leader[9] != "a"
+        if not marc8:
+            # raises UnicodeDecodeError, as pymarc does
+            str(raw, "utf-8")
+        fields = []
+        for entry in range(0, len(directory), DIRECTORY_ENTRY_LEN):
+            tag = directory[entry:entry + 3].decode("ascii")
+            length = int(directory[entry + 3:entry + 7])
+            start = base_address + int(directory[entry + 7:entry + 12])
+            if start + length > len(raw) - 1:
+                raise pymarc.exceptions.RecordDirectoryInvalid
+            # without the field terminator
+            fields.append(
+                CompactField.from_marc(tag, raw, marc8, start,
+                                       start + length - 1))
+        if not fields:
+            raise pymarc.exceptions.NoFieldsFound
+        record = cls(leader, fields)
+        record._raw = raw
+        return record
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    @property
+    def leader(self):
+        return self._leader
+
+    @leader.setter
+    def leader(self, value):
+        if str(value) != str(self._leader):
+            self._dirty = True
+        self._leader = value
+
+    @property
+    def fields(self):
+        return self._fields
+
+    @fields.setter
+    def fields(self, value):
+        value = TrackedList(value, self)
+        if len(value) != len(self._fields) or not all(
+                _same_field(new, old)
+                for new, old in zip(value, self._fields)):
+            self._dirty = True
+        self._fields = value
+
+    def tracks_changes(self):
+        """Return True if the record was read from a record in transmission
+        format, so is_modified tells if it was changed.
+        """
+        return self._raw is not None
+
+    def is_modified(self):
+        """Return True if the record was changed since it was read, or was not
+        read from a record in transmission format at all.
+        """
+        if self._raw is None or self._dirty:
+            return True
+        for field in self._fields:
+            if not isinstance(field, CompactField) or field.is_modified():
+                return True
+        return False
+
+    @classmethod
+    def from_record(cls, record):
+        """Convert a pymarc.Record."""
+        fields = []
+        for field in record.fields:
+            if field.is_control_field():
+                fields.append(CompactField(field.tag, data=field.data))
+            else:
+                fields.append(
+                    CompactField(field.tag, list(field.indicators),
+                                 list(field.subfields)))
+        return cls(str(record.leader), fields)
+
+    def to_record(self):
+        """Convert to a pymarc.Record."""
+        record = pymarc.Record(leader=str(self.leader))
+        # the Record constructor resets the lengths in the leader
+        record.leader = str(self.leader)
+        record.fields = [
+            field.to_field() if isinstance(field, CompactField) else field
+            for field in self.fields
+        ]
+        return record
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    # the rest of the pymarc.Record interface works on top of fields and
+    # leader
+    __str__ = pymarc.Record.__str__
+    __getitem__ = pymarc.Record.__getitem__
+    __contains__ = pymarc.Record.__contains__
+    add_field = pymarc.Record.add_field
+    add_grouped_field = pymarc.Record.add_grouped_field
+    add_ordered_field = pymarc.Record.add_ordered_field
+    _sort_fields = pymarc.Record._sort_fields
+    remove_field = pymarc.Record.remove_field
+    remove_fields = pymarc.Record.remove_fields
+    get_fields = pymarc.Record.get_fields
+    get_linked_fields = pymarc.Record.get_linked_fields
+
+    def as_marc(self):
+        """Return the record in transmission format.
+
+        Like pymarc.Record.as_marc, but an unmodified record is returned as it
+        was read, and in a modified record the unmodified fields are copied
+        instead of being encoded again.
+        """
+        if not self.is_modified():
+            return bytes(self._raw)
+
+        if self.leader[9] == "a" or self.force_utf8:
+            encoding = "utf-8"
+        else:
+            encoding = "iso8859-1"
+
+        directory = []
+        data = []
+        offset = 0
+        for field in self.fields:
+            field_data = None
+            if isinstance(field, CompactField):
+                field_data = field.raw_marc()
+            if field_data is None:
+                field_data = field.as_marc(encoding=encoding)
+            data.append(field_data)
+            directory.append(b"%3s%04d%05d" % (field.tag.encode(encoding),
+                                               len(field_data), offset))
+            offset += len(field_data)
+        directory.append(_end_of_field)
+        data.append(_end_of_record)
+
+        directory = b"".join(directory)
+        base_address = LEADER_LEN + len(directory)
+        record_length = base_address + offset + len(_end_of_record)
+        leader = "%05d%s%05d%s" % (record_length, self.leader[5:12],
+                                   base_address, self.leader[17:])
+        return leader.encode(encoding) + directory + b"".join(data)
+
+
+def decode_compact(raw):
+    """Return a CompactRecord for a record in transmission format, or None if
+    the record is broken (like decode_record).
+    """
+    try:
+        return CompactRecord.from_marc(raw)
+    except Exception:
+        return None
+
+
+def iter_compact_records(infile):
+    """Yield CompactRecords from a marc-file, or None for broken records.
+    Binary files are read like iter_records does, going on after a record
+    with a broken length; XML files are read with iter_records and
+    converted.
+    """
+    with open(infile, "rb") as fh:
+        if is_xml(fh):
+            for record in iter_xml_records(fh):
+                yield CompactRecord.from_record(record)
+            return
+    for raw in iter_mmap_records(infile):
+        # a copy, so the record doesn't hold on to the mapped file and can
+        # be sent to worker processes
+        yield decode_compact(bytes(raw))
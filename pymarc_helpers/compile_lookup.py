@@ -0,0 +1,32 @@
+"""Compile data/code_tables.json into data/lookup.json (see lookup.py).
+
+    python -m pymarc_helpers.compile_lookup
+    python -m pymarc_helpers.compile_lookup --check
+"""
+
+import argparse
+import sys
+
+from pymarc_helpers.lookup import LOOKUP_FILE, build_lookup, lookup_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the code tables into the lookup file.")
+    parser.add_argument("--check",
+                        action="store_true",
+                        help="""only check if the lookup file is up to date,
+                        exit with status 1 if it isn't""")
+    args = parser.parse_args()
+    if args.check:
+        if not lookup_tables.is_current():
+            print(f"{LOOKUP_FILE} is outdated, run python -m "
+                  "pymarc_helpers.compile_lookup", file=sys.stderr)
+            sys.exit(1)
+        return
+    build_lookup()
+    print(LOOKUP_FILE)
+
+
+if __name__ == "__main__":
+    main()
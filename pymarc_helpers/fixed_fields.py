@@ -0,0 +1,108 @@
+"""Batch operations on positions of fixed fields (leader, 008 etc.).
+
+The values at given positions are extracted for a whole chunk of records
+into a column (a list aligned with the records), lookups are applied once per
+distinct value instead of once per record, and the results are written back
+in bulk.
+
+Positions are given as in change_control_data: "35-37" or "6". The tag
+"LDR" stands for the leader.
+
+    records = batch_to_list("batch.mrc")
+    countries = fixed_field_column(records, "008", "15-17")
+    iso_codes = map_column(countries, country_codes_marc2iso, strip=True)
+"""
+
+from pymarc_helpers.lookup import lookup_tables
+from pymarc_helpers.pymarc_helpers import (add_country_044, add_language_041,
+                                           nonfiling_articles)
+
+
+def _slice(pos):
+    """Return the slice for a position string like "35-37"."""
+    positions = pos.split("-")
+    if len(positions) > 2:
+        raise ValueError(f"Invalid position: {pos}")
+    return slice(int(positions[0]), int(positions[-1]) + 1)
+
+
+def _get_data(record, tag):
+    if tag == "LDR":
+        return str(record.leader)
+    field = record[tag]
+    if field is None or not field.is_control_field():
+        return None
+    return field.data
+
+
+def fixed_field_column(records, tag, pos):
+    """Return a list with the values at `pos` of the fixed field `tag` of
+    every record. The value is None for records without the field.
+    """
+    positions = _slice(pos)
+    column = []
+    for record in records:
+        data = _get_data(record, tag)
+        column.append(None if data is None else data[positions])
+    return column
+
+
+def map_column(column, table, default=None, strip=False):
+    """Look up every value of a column in `table` (a dict) and return a
+    column with the results. Every distinct value is looked up only once.
+    Values not in the table (and None) are mapped to `default`. With
+    `strip`, trailing blanks are removed before the lookup.
+    """
+    lookup = {}
+    for value in set(column):
+        key = value.rstrip() if strip and value is not None else value
+        lookup[value] = table.get(key, default)
+    return [lookup[value] for value in column]
+
+
+def set_fixed_field_column(records, tag, pos, values):
+    """Write a column of values back to the position `pos` of the fixed field
+    `tag` of the records. None in `values` leaves a record unchanged, as do
+    missing fields.
+    """
+    positions = _slice(pos)
+    for record, value in zip(records, values):
+        if value is None:
+            continue
+        data = _get_data(record, tag)
+        if data is None:
+            continue
+        data = data[:positions.start] + value + data[positions.stop:]
+        if tag == "LDR":
+            record.leader = data
+        else:
+            record[tag].data = data
+
+
+def batch_language_041_from_008(records):
+    """language_041_from_008 for a list of records."""
+    for record, lang in zip(records,
+                            fixed_field_column(records, "008", "35-37")):
+        if lang is not None:
+            add_language_041(record, lang)
+
+
+def batch_country_044_from_008(records):
+    """country_044_from_008 for a list of records."""
+    column = fixed_field_column(records, "008", "15-17")
+    codes = lookup_tables.country_codes_marc2iso
+    for record, country044 in zip(records,
+                                  map_column(column, codes, strip=True)):
+        if country044 is not None:
+            add_country_044(record, country044)
+
+
+def batch_nonfiling_articles(records):
+    """nonfiling_articles for a list of records, with the articles of the
+    language in 008/35-37 of every record.
+    """
+    for record, lang in zip(records,
+                            fixed_field_column(records, "008", "35-37")):
+        field = record["245"]
+        if field is not None:
+            nonfiling_articles(field, lang)
@@ -0,0 +1,233 @@
+"""Synthetic MARC records for benchmarks and load tests.
+
+The records look like the ones the helpers are written for: 008 with
+language and country codes (the countries from code_dicts), 245 with and
+without leading articles from code_dicts.articles_by_language (matching the
+language), with ISBD punctuation and sometimes a nonfiling indicator,
+100/700 with relator terms from code_dicts.relators_by_name (and some
+variants and unknown terms), 264 with copyright dates and 300 $b with
+illustration terms from code_dicts.illustration_terms.
+
+The records are generated one at a time from a seeded random generator, so
+the same seed always gives the same records and files of any size can be
+written without holding them in memory:
+
+    generate_file("synthetic", 1000000, form="bin", seed=1)
+
+or from the command line:
+
+    python -m pymarc_helpers.generator -n 1000000 -f xml -o synthetic
+"""
+
+import argparse
+import random
+
+import pymarc
+
+from pymarc_helpers.code_dicts import (articles_by_language,
+                                       country_codes_marc2iso,
+                                       illustration_terms, relators_by_name,
+                                       relator_variants)
+from pymarc_helpers.pymarc_helpers import RecordWriter
+
+WORDS = {
+    "ger": ("Geschichte", "der", "Bibliothek", "und", "Gesellschaft",
+            "Sprache", "im", "Wandel", "Einführung", "Grundlagen", "Musik",
+            "Österreich", "Kunst", "Praxis", "Theorie", "für", "Handbuch"),
+    "eng": ("history", "of", "the", "library", "and", "society", "language",
+            "in", "change", "introduction", "to", "music", "art", "practice",
+            "theory", "for", "handbook"),
+    "fre": ("histoire", "de", "la", "bibliothèque", "et", "société",
+            "langue", "musique", "art", "pratique", "théorie", "manuel"),
+    "ita": ("storia", "della", "biblioteca", "e", "società", "lingua",
+            "musica", "arte", "pratica", "teoria", "manuale"),
+}
+SUBJECTS = {
+    language: tuple(word.capitalize() for word in words if len(word) > 4)
+    for language, words in WORDS.items()
+}
+# language codes for 008/35-37, with weights
+LANGUAGES = (("ger", 5), ("eng", 4), ("fre", 1), ("ita", 1))
+COUNTRIES = tuple(sorted(country_codes_marc2iso))
+RELATOR_TERMS = tuple(sorted(relators_by_name))
+RELATOR_VARIANTS = tuple(sorted(relator_variants)) + ("Hrsg.", "[Übers.]")
+ILLUSTRATION_TERMS = tuple(
+    sorted({term.strip()
+            for term in illustration_terms}))
+NAMES = ("Müller", "Schmidt", "Huber", "Smith", "Wagner", "Jones", "Bauer",
+         "Dubois", "Rossi", "Gruber")
+FORENAMES = ("Anna", "Peter", "Maria", "John", "Eva", "Thomas", "Sarah",
+             "Jürgen", "Claire", "Marco")
+PLACES = ("Wien", "Graz", "Berlin", "München", "London", "New York", "Paris",
+          "Milano")
+PUBLISHERS = ("Springer", "Böhlau", "Routledge", "Gallimard", "Einaudi",
+              "Leykam", "Wiley")
+
+
+def _language(rng):
+    return rng.choices([code for code, _ in LANGUAGES],
+                       [weight for _, weight in LANGUAGES])[0]
+
+
+def _name(rng):
+    return f"{rng.choice(NAMES)}, {rng.choice(FORENAMES)}"
+
+
+def _relator_term(rng):
+    roll = rng.random()
+    if roll < 0.8:
+        return rng.choice(RELATOR_TERMS)
+    if roll < 0.95:
+        return rng.choice(RELATOR_VARIANTS)
+    # not a relator term
+    return "Gestaltung und Satz"
+
+
+def _title_field(rng, language, statement):
+    words = WORDS[language]
+    title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 5)))
+    title = title[0].upper() + title[1:]
+    nonfiling = 0
+    if language in articles_by_language and rng.random() < 0.3:
+        article = rng.choice(articles_by_language[language])
+        # "D'" is written without a space
+        if not article.endswith("'"):
+            article += " "
+        title = f"{article}{title[0].lower()}{title[1:]}"
+        # the nonfiling indicator is set in some records
+        if rng.random() < 0.3:
+            nonfiling = len(article)
+    if rng.random() < 0.5:
+        subtitle = " ".join(
+            rng.choice(words) for _ in range(rng.randint(2, 6)))
+        subfields = ["a", title + " :", "b", subtitle + " /"]
+    else:
+        subfields = ["a", title + " /"]
+    subfields += ["c", statement + "."]
+    return pymarc.Field(tag="245",
+                        indicators=["1", str(nonfiling)],
+                        subfields=subfields)
+
+
+def generate_record(rng, number):
+    """Return a synthetic pymarc.Record. `rng` is a random.Random, `number`
+    goes into the control number.
+    """
+    record = pymarc.Record(leader="00000nam a2200000 i 4500")
+    year = rng.randint(1950, 2024)
+    language = _language(rng)
+    country = rng.choice(COUNTRIES).ljust(3)
+    record.add_field(
+        pymarc.Field(tag="001", data=f"99{number:014d}"),
+        pymarc.Field(
+            tag="008",
+            data=f"{rng.randint(0, 999999):06d}s{year}    {country}"
+            f"           000 0 {language} d"))
+    record.add_field(
+        pymarc.Field(tag="020",
+                     indicators=[" ", " "],
+                     subfields=["a", f"978{rng.randint(0, 10**10 - 1):010d}"]),
+        pymarc.Field(tag="035",
+                     indicators=[" ", " "],
+                     subfields=["a", f"(SYN){number}"]))
+    if rng.random() < 0.2:
+        # an existing 041, for language_041_from_008 to extend
+        record.add_field(
+            pymarc.Field(tag="041",
+                         indicators=["0", " "],
+                         subfields=["a", _language(rng)]))
+
+    author = _name(rng)
+    record.add_field(
+        pymarc.Field(
+            tag="100",
+            indicators=["1", " "],
+            subfields=["a", author + ",", "e",
+                       _relator_term(rng)]))
+    statement = " ".join(reversed(author.split(", ")))
+    record.add_field(_title_field(rng, language, statement))
+    record.add_field(
+        pymarc.Field(tag="264",
+                     indicators=[" ", "1"],
+                     subfields=[
+                         "a",
+                         rng.choice(PLACES) + " :", "b",
+                         rng.choice(PUBLISHERS) + ",", "c", f"[{year}]"
+                     ]))
+    if rng.random() < 0.3:
+        record.add_field(
+            pymarc.Field(tag="264",
+                         indicators=[" ", "4"],
+                         subfields=["c", f"© {year}"]))
+
+    subfields = ["a", f"{rng.randint(20, 900)} Seiten"]
+    if rng.random() < 0.6:
+        terms = rng.sample(ILLUSTRATION_TERMS, rng.randint(1, 3))
+        subfields[-1] += " :"
+        subfields += ["b", ", ".join(terms)]
+    subfields[-1] += " ;"
+    subfields += ["c", f"{rng.randint(15, 30)} cm"]
+    record.add_field(
+        pymarc.Field(tag="300", indicators=[" ", " "], subfields=subfields))
+
+    for _ in range(rng.randint(0, 5)):
+        record.add_field(
+            pymarc.Field(tag="650",
+                         indicators=[" ", "7"],
+                         subfields=[
+                             "a", rng.choice(SUBJECTS[language]), "2", "gnd"
+                         ]))
+    for _ in range(rng.randint(0, 3)):
+        subfields = ["a", _name(rng) + ","]
+        for _ in range(rng.randint(1, 2)):
+            subfields += ["e", _relator_term(rng)]
+        record.add_field(
+            pymarc.Field(tag="700", indicators=["1", " "],
+                         subfields=subfields))
+    return record
+
+
+def generate_records(count, seed=0):
+    """Yield `count` synthetic records. The same seed gives the same
+    records.
+    """
+    rng = random.Random(seed)
+    for number in range(count):
+        yield generate_record(rng, number)
+
+
+def generate_file(outfile_base, count, form="bin", seed=0):
+    """Write `count` synthetic records to a file in the format `form` (see
+    RecordWriter) and return its name.
+    """
+    with RecordWriter(outfile_base, form) as writer:
+        writer.write_all(generate_records(count, seed))
+    return writer.filename
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a file with synthetic MARC records.")
+    parser.add_argument("-n",
+                        "--records",
+                        type=int,
+                        default=1000,
+                        help="number of records, defaults to 1000")
+    parser.add_argument("-f",
+                        "--format",
+                        choices=list(RecordWriter.extensions),
+                        default="bin",
+                        help="output format, defaults to bin")
+    parser.add_argument("-o",
+                        "--output-file",
+                        default="synthetic",
+                        help="""name of the output file without extension,
+                        defaults to synthetic""")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate_file(args.output_file, args.records, args.format,
+                        args.seed))
+
+
+if __name__ == "__main__":
+    main()
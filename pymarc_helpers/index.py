@@ -0,0 +1,286 @@
+"""Byte-offset index for MARC files in transmission format (ISO 2709).
+
+The index is built by scanning the file once, using the record length in the
+leader to jump from record to record. It is stored in a compact sidecar file
+next to the MARC file (FILENAME.idx) and allows reading record N or the
+record with a given control number without parsing the records before it.
+"""
+
+import array
+import os
+import random
+import struct
+
+import pymarc
+
+from pymarc_helpers.pymarc_helpers import decode_record, is_xml, iter_records
+
+INDEX_MAGIC = b"PMHIDX1\n"
+# size and mtime of the indexed file, number of records, control numbers
+# stored or not
+INDEX_HEADER = struct.Struct("<QdQ?")
+LEADER_LEN = 24
+END_OF_RECORD = pymarc.constants.END_OF_RECORD.encode("ascii")
+
+
+class MarcIndexError(Exception):
+    pass
+
+
+def _control_number(raw):
+    """Return the content of 001 from a record in transmission format without
+    decoding the whole record.
+    """
+    try:
+        base_address = int(raw[12:17])
+        for entry_start in range(LEADER_LEN, base_address - 1, 12):
+            if raw[entry_start:entry_start + 3] == b"001":
+                length = int(raw[entry_start + 3:entry_start + 7])
+                start = base_address + int(raw[entry_start + 7:entry_start +
+                                               12])
+                # the field ends with a field terminator
+                return raw[start:start + length - 1].decode(
+                    "utf-8", "replace")
+    except ValueError:
+        # broken record
+        pass
+    return None
+
+
+def _length_to_end_of_record(fh, offset):
+    """Return the number of bytes from `offset` to the next end of record
+    (included), or to the end of the file. Moves the file position there.
+    """
+    fh.seek(offset)
+    length = 0
+    while True:
+        block = fh.read(2**16)
+        if not block:
+            return length
+        terminator = block.find(END_OF_RECORD)
+        if terminator >= 0:
+            length += terminator + 1
+            fh.seek(offset + length)
+            return length
+        length += len(block)
+
+
+def scan_records(fh, with_ids=True):
+    """Yield (offset, length, control number)-tuples for every record in an
+    open binary file handle. If `with_ids` is False, the records are skipped
+    instead of read and the control number is always None.
+
+    A record with a broken length is taken up to the next end of record, as
+    in iter_mmap_records, so the scan continues with the next record.
+    """
+    offset = fh.tell()
+    while True:
+        leader = fh.read(LEADER_LEN)
+        if not leader:
+            return
+        try:
+            length = int(leader[:5])
+        except ValueError:
+            length = 0
+        if length < LEADER_LEN:
+            length = _length_to_end_of_record(fh, offset)
+            yield offset, length, None
+            offset += length
+            continue
+        if with_ids:
+            raw = leader + fh.read(length - LEADER_LEN)
+            yield offset, length, _control_number(raw)
+        else:
+            fh.seek(length - LEADER_LEN, os.SEEK_CUR)
+            yield offset, length, None
+        offset += length
+
+
+def index_filename(infile):
+    """Return the name of the sidecar file for a MARC file."""
+    return infile + ".idx"
+
+
+class MarcIndex:
+    """Random access to the records of a MARC file in transmission format.
+
+    Usage:
+
+        index = MarcIndex.open("batch.mrc")
+        len(index)
+        index.record(1000)
+        index.find("990000141780203339")
+        index.sample(20)
+    """
+
+    def __init__(self, infile, offsets, ids=None):
+        """`offsets` is an array with the start of every record and the end
+        of the last one, `ids` an optional list with the control numbers.
+        """
+        self.infile = infile
+        self.offsets = offsets
+        self.ids = ids
+        self._positions = None
+
+    @classmethod
+    def build(cls, infile, with_ids=True):
+        """Scan a MARC file and return its index."""
+        offsets = array.array("Q")
+        ids = [] if with_ids else None
+        end = 0
+        with open(infile, "rb") as fh:
+            if is_xml(fh):
+                raise MarcIndexError(
+                    "Only MARC files in transmission format can be indexed.")
+            for offset, length, control_number in scan_records(
+                    fh, with_ids):
+                offsets.append(offset)
+                if with_ids:
+                    ids.append(control_number or "")
+                end = offset + length
+        offsets.append(end)
+        return cls(infile, offsets, ids)
+
+    @classmethod
+    def load(cls, infile, index_file=None):
+        """Load the index of a MARC file from its sidecar file.
+
+        Raise MarcIndexError if the sidecar file is not a valid index or the
+        MARC file changed since the index was built.
+        """
+        index_file = index_file or index_filename(infile)
+        stat = os.stat(infile)
+        with open(index_file, "rb") as fh:
+            if fh.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise MarcIndexError(f"{index_file} is not a MARC index.")
+            try:
+                size, mtime, count, with_ids = INDEX_HEADER.unpack(
+                    fh.read(INDEX_HEADER.size))
+                if size != stat.st_size or mtime != stat.st_mtime:
+                    raise MarcIndexError(f"{index_file} is out of date.")
+                offsets = array.array("Q")
+                offsets.fromfile(fh, count + 1)
+                ids = None
+                if with_ids:
+                    ids = fh.read().decode("utf-8").split("\n")
+                    if not count:
+                        ids = []
+            except (struct.error, EOFError, ValueError) as exc:
+                # truncated or corrupt
+                raise MarcIndexError(f"{index_file} is broken: {exc}")
+            if ids is not None and len(ids) != count:
+                raise MarcIndexError(f"{index_file} is broken.")
+        return cls(infile, offsets, ids)
+
+    @classmethod
+    def open(cls, infile, with_ids=True):
+        """Load the index of a MARC file, or build and save it if there is no
+        up to date index yet. If the index can't be saved (e.g. in a read-only
+        directory), it is only kept in memory.
+        """
+        try:
+            index = cls.load(infile)
+            if not with_ids or index.ids is not None:
+                return index
+        except (OSError, MarcIndexError):
+            pass
+        index = cls.build(infile, with_ids)
+        try:
+            index.save()
+        except OSError:
+            pass
+        return index
+
+    def save(self, index_file=None):
+        """Write the index to its sidecar file."""
+        index_file = index_file or index_filename(self.infile)
+        stat = os.stat(self.infile)
+        with open(index_file, "wb") as fh:
+            fh.write(INDEX_MAGIC)
+            fh.write(
+                INDEX_HEADER.pack(stat.st_size, stat.st_mtime, len(self),
+                                  self.ids is not None))
+            self.offsets.tofile(fh)
+            if self.ids is not None:
+                fh.write("\n".join(self.ids).encode("utf-8"))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def read_raw(self, n, fh=None):
+        """Return record number `n` in transmission format."""
+        start = self.offsets[n]
+        if fh is None:
+            with open(self.infile, "rb") as fh:
+                fh.seek(start)
+                return fh.read(self.offsets[n + 1] - start)
+        fh.seek(start)
+        return fh.read(self.offsets[n + 1] - start)
+
+    def record(self, n):
+        """Return record number `n` as a pymarc.Record, or None if it is
+        broken (see decode_record).
+        """
+        return decode_record(self.read_raw(n))
+
+    def records(self, numbers):
+        """Yield the records with the given numbers as pymarc.Records (None
+        for broken records).
+        """
+        with open(self.infile, "rb") as fh:
+            for n in numbers:
+                yield decode_record(self.read_raw(n, fh))
+
+    def find(self, control_number):
+        """Return the number of the record with the given control number, or
+        None if there is no such record.
+        """
+        if self.ids is None:
+            raise MarcIndexError("The index has no control numbers.")
+        if self._positions is None:
+            # first occurrence wins
+            self._positions = {}
+            for n, record_id in enumerate(self.ids):
+                self._positions.setdefault(record_id, n)
+        return self._positions.get(control_number)
+
+    def record_by_control_number(self, control_number):
+        """Return the record with the given control number, or None."""
+        n = self.find(control_number)
+        if n is None:
+            return None
+        return self.record(n)
+
+    def sample(self, size, seed=None):
+        """Return a random sample of `size` records (or all records if there
+        are less), in file order. Broken records are left out of the sample.
+        """
+        numbers = random.Random(seed).sample(range(len(self)),
+                                             min(size, len(self)))
+        return [
+            record for record in self.records(sorted(numbers))
+            if record is not None
+        ]
+
+
+def random_sample(infile, size, seed=None):
+    """Return a random sample of `size` records from a MARC file.
+
+    Binary files use the byte-offset index (built on first use); for XML
+    files a reservoir sample is drawn from the stream.
+    """
+    with open(infile, "rb") as fh:
+        xml = is_xml(fh)
+    if not xml:
+        return MarcIndex.open(infile, with_ids=False).sample(size, seed)
+
+    rng = random.Random(seed)
+    sample = []
+    for i, record in enumerate(iter_records(infile)):
+        if i < size:
+            sample.append((i, record))
+        else:
+            j = rng.randrange(i + 1)
+            if j < size:
+                sample[j] = (i, record)
+    return [record for _, record in sorted(sample, key=lambda x: x[0])]
@@ -0,0 +1,146 @@
+"""Opt-in instrumentation for processing runs.
+
+Instrumentation replaces the helper functions of pymarc_helpers with timed
+wrappers and wraps the process_record function of a processing script, so
+the time spent in every helper and in the script is known at the end of a
+run. Times are inclusive: the time of process_record contains the helpers
+it calls. Optionally the whole run is profiled with cProfile. Nothing is
+patched unless install is called, so there is no overhead when it isn't
+used.
+
+install has to be called before the processing script is loaded, so the
+script imports the wrapped helpers.
+"""
+
+import cProfile
+import collections
+import functools
+import time
+
+import texttable as TT
+
+import pymarc_helpers
+from pymarc_helpers import pymarc_helpers as helpers
+
+INSTRUMENTED = (
+    "change_control_data",
+    "sort_subfields",
+    "remove_isbd",
+    "insert_nonfiling_chars",
+    "relator_terms_to_codes",
+    "language_041_from_008",
+    "country_044_from_008",
+    "get_copyright",
+    "translate_ill",
+    "nonfiling_articles",
+)
+
+
+class Instrumentation:
+    """Time helper calls and process_record, count records and fields."""
+
+    def __init__(self, profile_file=None):
+        """If `profile_file` is given, the run is profiled with cProfile and
+        the stats are written to that file (see the pstats module).
+        """
+        self.profile_file = profile_file
+        self.profiler = cProfile.Profile() if profile_file else None
+        self.seconds = collections.Counter()
+        self.calls = collections.Counter()
+        self.records = 0
+        self.fields = 0
+        self._originals = {}
+        self._start = None
+        self._elapsed = 0.0
+
+    def _timed(self, name, func):
+        seconds = self.seconds
+        calls = self.calls
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds[name] += clock() - start
+                calls[name] += 1
+
+        return wrapper
+
+    def install(self):
+        """Replace the helper functions with timed wrappers."""
+        for name in INSTRUMENTED:
+            original = getattr(helpers, name)
+            self._originals[name] = original
+            wrapper = self._timed(name, original)
+            # the module itself, for helpers calling each other, and the
+            # package, for scripts importing from it
+            setattr(helpers, name, wrapper)
+            setattr(pymarc_helpers, name, wrapper)
+
+    def uninstall(self):
+        """Restore the original helper functions."""
+        for name, original in self._originals.items():
+            setattr(helpers, name, original)
+            setattr(pymarc_helpers, name, original)
+        self._originals = {}
+
+    def wrap_process_record(self, process_record):
+        """Return a timed version of a process_record function that also
+        counts the records and their fields.
+        """
+        timed = self._timed("process_record", process_record)
+
+        @functools.wraps(process_record)
+        def wrapper(rec):
+            rec = timed(rec)
+            self.records += 1
+            if rec is not None:
+                self.fields += len(rec.fields)
+            return rec
+
+        return wrapper
+
+    def start(self):
+        """Start measuring the run (and profiling, if enabled)."""
+        self._start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        """Stop measuring and write the profile, if enabled."""
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_file)
+        if self._start is not None:
+            self._elapsed += time.perf_counter() - self._start
+            self._start = None
+
+    def summary(self):
+        """Return the measurements as tables."""
+        table = TT.Texttable()
+        table.add_row(["Records", self.records])
+        table.add_row(["Fields", self.fields])
+        table.add_row(["Seconds", f"{self._elapsed:.3f}"])
+        if self._elapsed:
+            table.add_row(
+                ["Records/sec", f"{self.records / self._elapsed:.0f}"])
+
+        call_table = TT.Texttable()
+        call_table.header(["Function", "Calls", "Seconds", "us/call"])
+        call_table.set_deco(TT.Texttable.HEADER)
+        call_table.set_cols_dtype(["t", "i", "f", "f"])
+        call_table.set_cols_align(["l", "r", "r", "r"])
+        call_table.set_precision(3)
+        for name, seconds in self.seconds.most_common():
+            call_table.add_row([
+                name, self.calls[name], seconds,
+                seconds / self.calls[name] * 1e6
+            ])
+
+        summary = table.draw() + "\n\n" + call_table.draw()
+        if self.profile_file:
+            summary += f"\n\nProfile written to {self.profile_file}"
+        return summary
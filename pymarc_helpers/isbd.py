@@ -0,0 +1,106 @@
+"""Remove ISBD punctuation from subfield values according to rules.
+
+A rule says which punctuation is removed from the end of a value and in
+which cases it is kept (e.g. after initials, "Smith, J."). Rules are given
+per tag and subfield code, with fallbacks, so e.g. the periods of
+abbreviations can be kept in 245 $c only. The patterns of every rule are
+compiled once; only the subfield values are looked at, never the codes.
+
+    normalizer = IsbdNormalizer({
+        **DEFAULT_RULES,
+        ("245", "c"): {
+            "strip": ".,:;/",
+            "keep": [INITIALS, ABBREVIATIONS],
+        },
+    })
+    normalizer.normalize_fields(record.get_fields("245", "264", "300"))
+"""
+
+import re
+
+# a value ending with initials, e.g. "Hunt, A."
+INITIALS = r"\W[A-Z]\.$"
+# a value ending with a common abbreviation, e.g. "... [et al.]"
+ABBREVIATIONS = (r"\b(?:al|etc|ed|eds|Hrsg|Bd|Aufl|verb|erw|überarb|Jh|"
+                 r"ca|u\.a|i\.e|e\.g)\.$")
+
+# the rule for a subfield is looked up by (tag, code), then (tag, None),
+# then (None, code), then (None, None)
+DEFAULT_RULES = {
+    (None, None): {
+        "strip": ".,:;/",
+        "keep": [INITIALS],
+    },
+}
+
+
+class IsbdNormalizer:
+    """Remove ISBD punctuation from the subfield values of fields."""
+
+    def __init__(self, rules=None):
+        self.rules = DEFAULT_RULES if rules is None else rules
+        if (None, None) not in self.rules:
+            raise ValueError("The rules need a default rule (None, None).")
+        self._compiled = {}
+
+    def _compile(self, rule):
+        strip = tuple(rule["strip"])
+        keep = None
+        if rule.get("keep"):
+            keep = re.compile("|".join(f"(?:{pattern})"
+                                       for pattern in rule["keep"]))
+        return strip, keep
+
+    def rule(self, tag, code):
+        """Return the compiled rule for a subfield, as a tuple of the
+        punctuation characters to strip and the keep pattern (or None).
+        """
+        key = (tag, code)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            for candidate in (key, (tag, None), (None, code), (None, None)):
+                if candidate in self.rules:
+                    compiled = self._compile(self.rules[candidate])
+                    break
+            self._compiled[key] = compiled
+        return compiled
+
+    def normalize_value(self, value, tag=None, code=None):
+        """Return a subfield value without trailing ISBD punctuation and
+        surrounding whitespace.
+        """
+        strip, keep = self.rule(tag, code)
+        value = value.strip()
+        if value.endswith(strip) and (keep is None
+                                      or not keep.search(value)):
+            value = value[:-1].rstrip()
+        return value
+
+    def normalize(self, field):
+        """Remove the ISBD punctuation from the subfield values of a field.
+        Changes the field in place.
+        """
+        if field.is_control_field():
+            return
+        tag = field.tag
+        subfields = field.subfields
+        compiled = self._compiled
+        for i in range(1, len(subfields), 2):
+            value = subfields[i]
+            code = subfields[i - 1]
+            strip, keep = compiled.get((tag, code)) or self.rule(tag, code)
+            # normalize_value, inlined for speed
+            new = value.strip()
+            if new.endswith(strip) and (keep is None or not keep.search(new)):
+                new = new[:-1].rstrip()
+            if new != value:
+                subfields[i] = new
+
+    def normalize_fields(self, fields):
+        """normalize for every field of an iterable of fields."""
+        for field in fields:
+            self.normalize(field)
+
+
+# used by pymarc_helpers.remove_isbd
+isbd_normalizer = IsbdNormalizer()
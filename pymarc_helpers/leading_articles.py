@@ -0,0 +1,98 @@
+"""Find leading articles in titles (245 $a) for nonfiling characters.
+
+The articles of code_dicts.articles_by_language are compiled once into one
+regular expression per language, longest article first, instead of trying
+every article in turn for every title. With the language of a record
+(008/35-37), only the articles of that language are used, so the German
+"Die" isn't taken for an article in an English title. The patterns are
+compiled on the first match. The applied articles are counted.
+"""
+
+import collections
+import re
+
+import texttable as TT
+
+from pymarc_helpers.lookup import lookup_tables
+
+
+def _compile(articles):
+    # longest first, so "Eine" is tried before "Ein"
+    alternatives = sorted(set(articles), key=len, reverse=True)
+    return re.compile("(%s) " % "|".join(map(re.escape, alternatives)))
+
+
+class ArticleMatcher:
+    """Match the leading article of a title.
+
+    Titles in languages without articles in the table (and titles without a
+    language) are matched against the articles of all languages, unless
+    `strict` is set. Applied articles are counted in the Counter `applied`
+    by (language, article). `table` defaults to
+    code_dicts.articles_by_language.
+    """
+
+    def __init__(self, table=None, strict=False):
+        self.table = table
+        self.patterns = None
+        self.any_pattern = None
+        self.strict = strict
+        self.applied = collections.Counter()
+
+    def _compile_patterns(self):
+        table = self.table
+        if table is None:
+            table = lookup_tables.articles_by_language
+        self.patterns = {
+            language: _compile(articles)
+            for language, articles in table.items()
+        }
+        self.any_pattern = _compile(
+            [article for articles in table.values() for article in articles])
+
+    def match(self, title, language=None):
+        """Return the leading article of a title, or None."""
+        if self.patterns is None:
+            self._compile_patterns()
+        pattern = self.patterns.get(language)
+        if pattern is None:
+            if self.strict:
+                return None
+            pattern = self.any_pattern
+        match = pattern.match(title)
+        if match is None:
+            return None
+        return match.group(1)
+
+    def apply(self, field, language=None):
+        """Mark the leading article of $$a of a field as nonfiling
+        ("<<Die>> Titel"). Return the article, or None if there is none.
+        """
+        title = field["a"]
+        if not title:
+            return None
+        article = self.match(title, language)
+        if article is None:
+            return None
+        field["a"] = f"<<{article}>>{title[len(article):]}"
+        self.applied[language, article] += 1
+        return article
+
+    def report(self):
+        """Return a table with the applied articles and how often they were
+        applied, or an empty string if there were none.
+        """
+        if not self.applied:
+            return ""
+        table = TT.Texttable()
+        table.header(["Language", "Article", "Count"])
+        table.set_deco(TT.Texttable.HEADER)
+        table.set_cols_dtype(["t", "t", "i"])
+        table.set_cols_align(["l", "l", "r"])
+        for (language, article), count in self.applied.most_common():
+            table.add_row([language or "", article, count])
+        return table.draw()
+
+
+# used by pymarc_helpers.nonfiling_articles
+article_matcher = ArticleMatcher()
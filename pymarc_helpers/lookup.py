@@ -0,0 +1,158 @@
+"""Compiled lookup tables for the code tables.
+
+The code tables (relator terms, country codes, illustration terms, articles)
+are kept as data in data/code_tables.json, so they can be updated without
+changing code. They are compiled into data/lookup.json, together with the
+normalized keys the helpers look up and the reverse maps (see
+compile_tables):
+
+    python -m pymarc_helpers.compile_lookup
+
+The compiled tables are loaded on first use, not on import, so importing
+the package (in the CLI and in every worker process) doesn't build them.
+lookup.json records its format version and a checksum of code_tables.json;
+if they don't match (e.g. the tables were edited, but not compiled), the
+tables are compiled in memory instead.
+"""
+
+import hashlib
+import json
+import os
+
+FORMAT_VERSION = 1
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+TABLES_FILE = os.path.join(DATA_DIR, "code_tables.json")
+LOOKUP_FILE = os.path.join(DATA_DIR, "lookup.json")
+
+TABLES = ("relators_by_name", "relator_variants", "country_codes_marc2iso",
+          "illustration_terms", "articles_by_language")
+
+
+def normalize_illustration_term(term):
+    """Return an illustration term as it is looked up: in lower case,
+    without surrounding whitespace.
+    """
+    return term.strip().lower()
+
+
+def compile_tables(tables):
+    """Return the lookup maps for the code tables (the content of
+    code_tables.json):
+
+    - the tables themselves, by their names in TABLES,
+    - relator_codes: normalized relator term (see relators.normalize_term)
+      -> code, for the terms of relators_by_name and relator_variants and
+      the codes themselves,
+    - relator_terms: code -> the terms of relators_by_name,
+    - country_codes_iso2marc: the reverse of country_codes_marc2iso,
+    - illustration_terms_normalized: illustration_terms with normalized
+      keys (see normalize_illustration_term).
+    """
+    # relators imports this module
+    from pymarc_helpers.relators import normalize_term
+
+    maps = {name: tables[name] for name in TABLES}
+
+    relator_codes = {}
+    for name in ("relators_by_name", "relator_variants"):
+        for term, code in tables[name].items():
+            relator_codes.setdefault(normalize_term(term), code)
+    # codes entered as terms
+    for code in tables["relators_by_name"].values():
+        relator_codes.setdefault(code, code)
+    maps["relator_codes"] = relator_codes
+
+    relator_terms = {}
+    for term, code in tables["relators_by_name"].items():
+        relator_terms.setdefault(code, []).append(term)
+    maps["relator_terms"] = relator_terms
+
+    country_codes_iso2marc = {}
+    for marc, iso in tables["country_codes_marc2iso"].items():
+        country_codes_iso2marc.setdefault(iso, marc)
+    maps["country_codes_iso2marc"] = country_codes_iso2marc
+
+    illustration_terms_normalized = {}
+    for term, translation in tables["illustration_terms"].items():
+        illustration_terms_normalized.setdefault(
+            normalize_illustration_term(term), translation)
+    maps["illustration_terms_normalized"] = illustration_terms_normalized
+    return maps
+
+
+def _checksum(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_lookup(tables_file=TABLES_FILE, lookup_file=LOOKUP_FILE):
+    """Compile the code tables of `tables_file` and write them to
+    `lookup_file`.
+    """
+    with open(tables_file, "rb") as fh:
+        source = fh.read()
+    compiled = {
+        "version": FORMAT_VERSION,
+        "checksum": _checksum(source),
+        "maps": compile_tables(json.loads(source)),
+    }
+    with open(lookup_file, "w", encoding="utf-8") as fh:
+        json.dump(compiled, fh, ensure_ascii=False, separators=(",", ":"))
+        fh.write("\n")
+
+
+class LookupTables:
+    """The compiled code tables, loaded on first use.
+
+    Every map of compile_tables is an attribute, e.g.
+    lookup_tables.relator_codes. `compiled` tells if the maps were loaded
+    from the compiled file; it is None before they are loaded.
+    """
+
+    def __init__(self, tables_file=TABLES_FILE, lookup_file=LOOKUP_FILE):
+        self.tables_file = tables_file
+        self.lookup_file = lookup_file
+        self.compiled = None
+        self._maps = None
+
+    def is_current(self):
+        """Check if the compiled file matches the code tables."""
+        return self._read()[1] is not None
+
+    def _read(self):
+        # return the code tables and the compiled maps, or None for the
+        # maps if the compiled file is missing or outdated
+        with open(self.tables_file, "rb") as fh:
+            source = fh.read()
+        try:
+            with open(self.lookup_file, encoding="utf-8") as fh:
+                compiled = json.load(fh)
+        except (OSError, ValueError):
+            return source, None
+        if (compiled.get("version") != FORMAT_VERSION
+                or compiled.get("checksum") != _checksum(source)):
+            return source, None
+        return source, compiled["maps"]
+
+    def load(self):
+        """Return the maps, loading them on the first call."""
+        if self._maps is None:
+            source, maps = self._read()
+            self.compiled = maps is not None
+            if maps is None:
+                maps = compile_tables(json.loads(source))
+            self._maps = maps
+        return self._maps
+
+    def __getattr__(self, name):
+        # only called for attributes that aren't set, i.e. the maps
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.load()[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+# used by the helpers and code_dicts
+lookup_tables = LookupTables()
+
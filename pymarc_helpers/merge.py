@@ -0,0 +1,128 @@
+"""Merge MARC files and remove duplicate records.
+
+Merging takes two passes over the input files. The first one reads the
+dedupe key of every record (the control number, or the system number in
+035 $a) and keeps a hash index of key -> position and completeness of the
+record to keep, so only keys and positions are ever held in memory, never
+records. The second pass streams the files again and writes the records
+to keep, in their original order. Records without a key are always kept.
+
+For binary input and output the records are copied in the second pass
+without decoding them.
+
+    summary = merge_files(["vendor1.mrc", "vendor2.xml"], "merged",
+                          key="035", keep="most-complete")
+"""
+
+import array
+import collections
+import hashlib
+
+from pymarc_helpers.pymarc_helpers import (RecordWriter, control_number,
+                                           is_xml, iter_mmap_records,
+                                           iter_records)
+
+DEDUPE_KEYS = ("001", "035")
+KEEP = ("first", "last", "most-complete")
+
+
+def dedupe_key(record, key="001"):
+    """Return the dedupe key of a record: the control number (001) or the
+    first system number (035 $a), or None if the record has none.
+    """
+    if key == "001":
+        value = control_number(record)
+    elif key == "035":
+        value = None
+        for field in record.get_fields("035"):
+            if field["a"]:
+                value = field["a"]
+                break
+    else:
+        raise ValueError(f"Unknown dedupe key: {key}")
+    if value is None or not value.strip():
+        return None
+    return value.strip()
+
+
+def completeness(record):
+    """Return the number of control fields and subfields of a record."""
+    return sum(1 if field.is_control_field() else len(field.subfields) // 2
+               for field in record.fields)
+
+
+def _hash_key(value):
+    # 8 bytes per key instead of the whole string
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+
+
+def build_key_index(infiles, key="001", keep="first"):
+    """Read the records of the files once and return
+
+    - the index of the records to keep: a dict mapping the hashed key to
+      (file number, record number, completeness),
+    - for every file an array with the numbers of the records without key,
+    - a Counter with the number of records read, of broken records and of
+      records without key.
+    """
+    if keep not in KEEP:
+        raise ValueError(f"Unknown keep mode: {keep}")
+    index = {}
+    without_key = [array.array("Q") for _ in infiles]
+    counts = collections.Counter()
+    for file_number, infile in enumerate(infiles):
+        for number, record in enumerate(iter_records(infile)):
+            counts["read"] += 1
+            if record is None:
+                counts["broken"] += 1
+                continue
+            value = dedupe_key(record, key)
+            if value is None:
+                counts["without key"] += 1
+                without_key[file_number].append(number)
+                continue
+            hashed = _hash_key(value)
+            score = completeness(record) if keep == "most-complete" else 0
+            current = index.get(hashed)
+            # ties keep the first record
+            if (current is None or keep == "last"
+                    or (keep == "most-complete" and score > current[2])):
+                index[hashed] = (file_number, number, score)
+    return index, without_key, counts
+
+
+def merge_files(infiles, outfile_base="output", form="bin", key="001",
+                keep="first"):
+    """Merge MARC files (binary or xml) into one file in the format `form`
+    (see RecordWriter), keeping one record per dedupe key (see dedupe_key):
+    the first, the last or the most complete one (see completeness).
+
+    Return a Counter with the number of records read, written, without key,
+    broken and the duplicates removed.
+    """
+    index, kept, counts = build_key_index(infiles, key, keep)
+    for file_number, number, _ in index.values():
+        kept[file_number].append(number)
+    del index
+
+    with RecordWriter(outfile_base, form) as writer:
+        for infile, numbers in zip(infiles, kept):
+            numbers = iter(sorted(numbers))
+            wanted = next(numbers, None)
+            with open(infile, "rb") as fh:
+                xml = is_xml(fh)
+            if form == "bin" and not xml:
+                # copied without decoding
+                records = iter_mmap_records(infile)
+                write = writer.write_raw
+            else:
+                records = iter_records(infile)
+                write = writer.write
+            for number, record in enumerate(records):
+                if number == wanted:
+                    write(record)
+                    wanted = next(numbers, None)
+        counts["written"] = writer.count
+    counts["duplicates"] = (counts["read"] - counts["broken"] -
+                            counts["written"])
+    return counts
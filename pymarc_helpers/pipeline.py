@@ -0,0 +1,218 @@
+"""Chain helper functions into a single pass over each record.
+
+A Pipeline is a list of steps. Every step declares the fields it works on,
+so the fields are looked up once per record and shared by all steps instead
+of every helper calling record["008"], record.get_fields("245") etc. on its
+own. The time spent in every step is measured.
+
+Usage in a processing script:
+
+    from pymarc_helpers.pipeline import Pipeline
+
+    pipeline = (Pipeline()
+                .add("remove_isbd", tags=("245", "264", "300"))
+                .add("relator_terms_to_codes")
+                .add("language_041_from_008")
+                .add("country_044_from_008"))
+    process_record = pipeline.compile()
+"""
+
+import collections
+import time
+
+import texttable as TT
+
+from pymarc_helpers import pymarc_helpers as helpers
+
+
+# The helpers that work on the record are called through these functions,
+# with the fields the pipeline already looked up (a dict mapping tags to
+# lists of fields), instead of looking them up again. They keep the dict up
+# to date with the fields they add.
+def _nonfiling_articles(field, fields):
+    language = fields["008"][0].data[35:38] if fields["008"] else None
+    helpers.nonfiling_articles(field, language)
+
+
+def _language_041_from_008(rec, fields):
+    field041 = helpers.add_language_041(rec, fields["008"][0].data[35:38],
+                                        fields["041"])
+    fields["041"] = fields["041"] or [field041]
+
+
+def _country_044_from_008(rec, fields):
+    country044 = helpers.country_from_008(fields["008"][0].data)
+    if country044 is not None:
+        field044 = helpers.add_country_044(rec, country044, fields["044"])
+        fields["044"] = fields["044"] or [field044]
+
+
+def _translate_ill(rec, fields):
+    helpers.translate_ill_field(fields["300"][0])
+
+
+# scope "field": the function is called with every field with one of the tags
+# scope "record": the function is called with the record, and skipped if one
+# of the required fields is missing; the fields in "changes" may be added or
+# removed by the function
+# "apply" is called instead of the helper with the field or record and the
+# fields looked up, including the ones in "uses"
+HELPERS = {
+    "remove_isbd": {
+        "scope": "field",
+        "tags": ("245", "246", "250", "264", "300", "490"),
+    },
+    "relator_terms_to_codes": {
+        "scope": "field",
+        "tags": ("100", "110", "111", "700", "710", "711"),
+    },
+    "nonfiling_articles": {
+        "scope": "field",
+        "tags": ("245", ),
+        "uses": ("008", ),
+        "apply": _nonfiling_articles,
+    },
+    "language_041_from_008": {
+        "scope": "record",
+        "requires": ("008", ),
+        "changes": ("041", ),
+        "uses": ("041", ),
+        "apply": _language_041_from_008,
+    },
+    "country_044_from_008": {
+        "scope": "record",
+        "requires": ("008", ),
+        "changes": ("044", ),
+        "uses": ("044", ),
+        "apply": _country_044_from_008,
+    },
+    "translate_ill": {
+        "scope": "record",
+        "requires": ("300", ),
+        "apply": _translate_ill,
+    },
+}
+
+Step = collections.namedtuple(
+    "Step", ["name", "func", "scope", "tags", "changes", "uses", "apply"])
+
+
+class Pipeline:
+    """A chain of processing steps applied to a record in one pass."""
+
+    def __init__(self):
+        self.steps = []
+        self.seconds = collections.Counter()
+        self.calls = collections.Counter()
+        self.records = 0
+
+    def add(self,
+            func,
+            tags=None,
+            scope=None,
+            requires=None,
+            changes=None,
+            name=None):
+        """Add a step and return the pipeline.
+
+        `func` is a function or the name of one of the helpers in HELPERS,
+        whose declared fields are used unless they are overridden. For steps
+        with scope "field", `tags` are the fields the function is called
+        with. For steps with scope "record", `requires` are the fields that
+        have to exist for the step to run and `changes` the fields the
+        function may add or remove.
+        """
+        defaults = {}
+        apply = None
+        if isinstance(func, str):
+            if func not in HELPERS:
+                raise ValueError(f"Unknown helper function: {func}")
+            defaults = HELPERS[func]
+            name = name or func
+            apply = defaults.get("apply")
+            func = getattr(helpers, func)
+        scope = scope or defaults.get("scope", "record")
+        if scope == "field":
+            tags = tags or defaults.get("tags")
+            if not tags:
+                raise ValueError("Steps with scope 'field' need tags.")
+        elif scope == "record":
+            tags = requires or defaults.get("requires", ())
+        else:
+            raise ValueError(f"Unknown scope: {scope}")
+        changes = changes or defaults.get("changes", ())
+        name = name or func.__name__
+        uses = defaults.get("uses", ()) if apply is not None else ()
+        self.steps.append(
+            Step(name, func, scope, tuple(tags), tuple(changes), uses,
+                 apply))
+        return self
+
+    def compile(self):
+        """Return a function process_record(rec) that applies all steps to
+        a record and returns it.
+        """
+        steps = list(self.steps)
+        wanted = {
+            tag
+            for step in steps for tag in step.tags + step.uses
+        }
+        seconds = self.seconds
+        calls = self.calls
+        clock = time.perf_counter
+
+        def process_record(rec):
+            # one pass over the fields to look up all tags the steps need
+            fields = collections.defaultdict(list)
+            for field in rec.fields:
+                if field.tag in wanted:
+                    fields[field.tag].append(field)
+
+            for step in steps:
+                start = clock()
+                if step.scope == "field":
+                    for tag in step.tags:
+                        for field in fields[tag]:
+                            if step.apply is None:
+                                step.func(field)
+                            else:
+                                step.apply(field, fields)
+                elif not all(fields[tag] for tag in step.tags):
+                    continue
+                elif step.apply is not None:
+                    step.apply(rec, fields)
+                else:
+                    step.func(rec)
+                    # refresh fields the step may have added or removed
+                    for tag in step.changes:
+                        if tag in wanted:
+                            fields[tag] = rec.get_fields(tag)
+                seconds[step.name] += clock() - start
+                calls[step.name] += 1
+            self.records += 1
+            return rec
+
+        return process_record
+
+    def run(self, records):
+        """Apply the pipeline to all records of an iterable and yield them."""
+        process_record = self.compile()
+        for rec in records:
+            yield process_record(rec)
+
+    def report(self):
+        """Return a table with the time spent in every step."""
+        table = TT.Texttable()
+        table.header(["Step", "Calls", "Seconds", "Share"])
+        table.set_deco(TT.Texttable.HEADER)
+        table.set_cols_dtype(["t", "i", "f", "t"])
+        table.set_cols_align(["l", "r", "r", "r"])
+        table.set_precision(3)
+        total = sum(self.seconds.values()) or 1
+        for step in self.steps:
+            share = self.seconds[step.name] / total
+            table.add_row([
+                step.name, self.calls[step.name], self.seconds[step.name],
+                f"{share:.0%}"
+            ])
+        return f"{self.records} records\n\n" + table.draw()
@@ -1,76 +1,457 @@
 #!/bin/python3
 
+import collections
+import copy
+import csv
+import io
+import itertools
+import json
+import mmap
+import multiprocessing
+import os
+import time
 import pymarc
 import texttable as TT
-from pymarc_helpers.code_dicts import *
+from pymarc_helpers import code_dicts
+from pymarc_helpers.leading_articles import article_matcher
+from pymarc_helpers.isbd import isbd_normalizer
+from pymarc_helpers.lookup import (lookup_tables,
+                                    normalize_illustration_term)
+from pymarc_helpers.relators import relator_resolver
 import re
+import xml.etree.ElementTree as ET
+
+_end_of_record = pymarc.constants.END_OF_RECORD.encode("ascii")
+
+
+def __getattr__(name):
+    # the code tables, loaded on first use (see code_dicts)
+    if name in code_dicts.NAMES:
+        return getattr(code_dicts, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class WrongFieldError(Exception):
     pass
 
 
+def is_xml(fh):
+    """Check if an open binary file handle contains MARC-XML.
+
+    Looks at the first line only and sets the pointer back to where it was.
+    """
+    pos = fh.tell()
+    firstline = fh.readline()
+    fh.seek(pos)
+    return b"<?xml version" in firstline
+
+
+def _local_name(tag):
+    """Strip the namespace from an ElementTree tag."""
+    return tag.rpartition("}")[2]
+
+
+def _xml_to_record(elem):
+    """Build a pymarc.Record from a MARC-XML <record> element."""
+    record = pymarc.Record()
+    for child in elem:
+        element = _local_name(child.tag)
+        if element == "leader":
+            record.leader = child.text or ""
+        elif element == "controlfield":
+            record.add_field(
+                pymarc.Field(tag=child.get("tag"), data=child.text or ""))
+        elif element == "datafield":
+            subfields = []
+            for subfield in child:
+                subfields.append(subfield.get("code"))
+                subfields.append(subfield.text or "")
+            record.add_field(
+                pymarc.Field(tag=child.get("tag"),
+                             indicators=[child.get("ind1", " "),
+                                         child.get("ind2", " ")],
+                             subfields=subfields))
+    return record
+
+
+def iter_xml_records(xml_file):
+    """Parse a MARC-XML file incrementally and yield pymarc.Record objects.
+
+    Takes a filename or an open file handle. Every <record> element is cleared
+    as soon as it has been converted, so memory use does not grow with the
+    size of the file. Namespaced and non-namespaced MARC-XML are both read.
+    """
+    context = ET.iterparse(xml_file, events=("start", "end"))
+    # the first event is the start of the root element; keep a reference to
+    # it to get rid of the already processed records
+    _, root = next(context)
+    for event, elem in context:
+        if event == "end" and _local_name(elem.tag) == "record":
+            yield _xml_to_record(elem)
+            elem.clear()
+            root.clear()
+
+
+def iter_records(infile):
+    """Take a filename of a marc-file (binary or xml) and yield
+    pymarc.Record objects one at a time.
+
+    Unlike batch_to_list, the batch is never held in memory as a whole, so it
+    can be used on arbitrarily large files.
+    """
+    with open(infile, "rb") as fh:
+        if is_xml(fh):
+            yield from iter_xml_records(fh)
+            return
+    # binary files are memory-mapped and decoded like pymarc.MARCReader
+    # does (utf8_handling="strict"); unlike MARCReader, reading goes on
+    # after a record with a broken length
+    for raw in iter_mmap_records(infile):
+        yield decode_record(raw)
+
+
+def iter_raw_records(fh):
+    """Yield the records of an open binary file handle of a marc-file in
+    transmission format as bytes, without decoding them.
+    """
+    while True:
+        first5 = fh.read(5)
+        if not first5:
+            return
+        try:
+            length = int(first5)
+        except ValueError:
+            # let the decoder complain about the broken record
+            yield first5
+            continue
+        yield first5 + fh.read(length - 5)
+
+
+def iter_mmap_records(infile, start=0, end=None):
+    """Yield the records of a binary marc-file in transmission format as
+    memoryview slices of the memory-mapped file, without copying them.
+
+    With `start` and `end`, only the records beginning in that byte range are
+    yielded: reading starts after the first end of record at or after
+    start - 1, so the records of a file split into adjacent ranges (see
+    file_regions) are read exactly once, by different workers if need be.
+    A record with a broken length is yielded up to the next end of record,
+    for the decoder to reject.
+    """
+    with open(infile, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size == 0:
+            return
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        end = size if end is None else min(end, size)
+        pos = start
+        if start > 0:
+            pos = mm.find(_end_of_record, start - 1) + 1
+            if pos == 0:
+                return
+        while pos < end:
+            try:
+                length = int(mm[pos:pos + 5])
+            except ValueError:
+                length = 0
+            if length < 5:
+                terminator = mm.find(_end_of_record, pos)
+                length = (size if terminator < 0 else terminator + 1) - pos
+            yield view[pos:pos + length]
+            pos += length
+    finally:
+        view.release()
+        try:
+            mm.close()
+        except BufferError:
+            # slices are still in use; the map is closed when they are gone
+            pass
+
+
+def file_regions(infile, parts):
+    """Split a file into `parts` adjacent byte ranges of about equal size
+    and return them as (start, end)-tuples for iter_mmap_records.
+    """
+    size = os.path.getsize(infile)
+    bounds = [size * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts)
+            if bounds[i] < bounds[i + 1]]
+
+
+def decode_record(raw):
+    """Decode a record in transmission format the way pymarc.MARCReader
+    does: return a pymarc.Record, or None if the record is broken. `raw` can
+    also be a memoryview, e.g. from iter_mmap_records.
+    """
+    if raw[-1:] != _end_of_record:
+        # truncated, or the length is wrong
+        return None
+    try:
+        if not isinstance(raw, bytes):
+            raw = bytes(raw)
+        return pymarc.Record(raw)
+    except Exception:
+        return None
+
+
 def batch_to_list(infile):
     """Take a filename of a marc-file (binary or xml)and return a list of pymarc.Record objects."""
-    with open(infile, "rb") as fh:
-        # check if its xml or binary
-        firstline = fh.readline()
-        # set the pointer back to the beginning
-        fh.seek(0)
-        if b"<?xml version" in firstline:
-            reader = pymarc.parse_xml_to_array(fh)
-        else:
-            # default: utf8_handling="strict"
-            reader = pymarc.MARCReader(fh)
+    return list(iter_records(infile))
+
+
+def chunked(iterable, size):
+    """Split an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def control_number(record):
+    """Return the control number (001) of a record, or None if it has none."""
+    if record["001"]:
+        return record["001"].data
+    return None
+
 
-        record_list = list(reader)
-    return record_list
+def imap_bounded(pool, func, iterable, max_pending):
+    """Apply func to every item of iterable in a multiprocessing.Pool and
+    yield the results in order.
+
+    Unlike Pool.imap, at most `max_pending` items are handed to the pool at a
+    time, so a large input is not read into memory faster than the workers
+    can process it.
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item, )))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def clone_field(field):
+    """Return a copy of a pymarc.Field that can be changed without affecting
+    the original.
+
+    Much cheaper than copy.deepcopy: the strings in a field are immutable, so
+    only the lists holding them are copied.
+    """
+    clone = copy.copy(field)
+    if not field.is_control_field():
+        clone.indicators = list(field.indicators)
+        clone.subfields = list(field.subfields)
+    return clone
 
 
-def getstats(record_list, filename=None):
+def clone_record(record):
+    """Return a copy of a pymarc.Record that can be changed without affecting
+    the original. See clone_field.
+    """
+    clone = copy.copy(record)
+    if isinstance(record.leader, pymarc.Leader):
+        clone.leader = pymarc.Leader(str(record.leader))
+    clone.fields = [clone_field(field) for field in record.fields]
+    return clone
+
+
+class FieldStats:
+    """Field statistics of a batch of records.
+
+    Counts the records, the occurrences of every field (data fields by tag and
+    indicators) and the occurrences of every subfield code per field. Partial
+    statistics, e.g. of chunks processed in different processes, are combined
+    with merge.
+
+    `seconds` is the time spent in update, `bytes` the size of the input if
+    known (see file_stats).
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.fields = collections.Counter()
+        self.subfields = collections.defaultdict(collections.Counter)
+        self.bytes = None
+        self.seconds = 0.0
+
+    def add(self, record):
+        """Add a single record to the statistics."""
+        self.records += 1
+        for field in record.fields:
+            # FMT and LDR are found in Aleph-Exports
+            if field.is_control_field() or field.tag in ("FMT", "LDR"):
+                self.fields[field.tag] += 1
+            else:
+                tag = field.tag + field.indicators[0].replace(
+                    " ", "#") + field.indicators[1].replace(" ", "#")
+                self.fields[tag] += 1
+                # subfield codes are every other element in the list
+                self.subfields[tag].update(field.subfields[::2])
+
+    def update(self, records):
+        """Add records from any iterable and return the statistics. Broken
+        records (None) are skipped.
+        """
+        start = time.perf_counter()
+        for record in records:
+            if record is not None:
+                self.add(record)
+        self.seconds += time.perf_counter() - start
+        return self
+
+    def merge(self, other):
+        """Add the counts of another FieldStats object and return the
+        statistics. The times are not added, as partial statistics are
+        usually computed at the same time.
+        """
+        self.records += other.records
+        self.fields.update(other.fields)
+        for tag, codes in other.subfields.items():
+            self.subfields[tag].update(codes)
+        if other.bytes is not None:
+            self.bytes = (self.bytes or 0) + other.bytes
+        return self
+
+    def subfield_codes(self, tag):
+        """Return the set of subfield codes occurring in a field."""
+        return set(self.subfields.get(tag, ()))
+
+    def records_per_second(self):
+        """Return the throughput, or None if no time was measured."""
+        if not self.seconds:
+            return None
+        return self.records / self.seconds
+
+    def to_dict(self):
+        """Return the statistics as a dict that can be serialized to JSON."""
+        return {
+            "records": self.records,
+            "bytes": self.bytes,
+            "seconds": self.seconds,
+            "records_per_second": self.records_per_second(),
+            "fields": [{
+                "tag": tag,
+                "count": self.fields[tag],
+                "subfields": dict(sorted(self.subfields.get(tag, {}).items()))
+            } for tag in sorted(self.fields)],
+        }
+
+    def to_json(self):
+        """Return the statistics as JSON, see to_dict."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_csv(self):
+        """Return the statistics as CSV with the columns metric, tag,
+        subfield and value: one row for each of the overall figures (records,
+        bytes, seconds, records_per_second), each field and each subfield.
+        """
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["metric", "tag", "subfield", "value"])
+        for metric in ("records", "bytes", "seconds", "records_per_second"):
+            value = getattr(self, metric)
+            if callable(value):
+                value = value()
+            writer.writerow([metric, "", "", "" if value is None else value])
+        for tag in sorted(self.fields):
+            writer.writerow(["field", tag, "", self.fields[tag]])
+            for code, count in sorted(self.subfields.get(tag, {}).items()):
+                writer.writerow(["subfield", tag, code, count])
+        return out.getvalue()
+
+
+def _region_stats(region):
+    """Return the FieldStats of the records in a region of a binary
+    marc-file, given as (filename, start, end).
+    """
+    infile, start, end = region
+    return FieldStats().update(
+        decode_record(raw) for raw in iter_mmap_records(infile, start, end))
+
+
+def file_stats(infile, workers=1, regions=None):
+    """Return the FieldStats of a marc-file (binary or xml) in a single pass.
+
+    The file is streamed, never read into memory as a whole. With more than
+    one worker, a binary file is split into `regions` byte ranges (four per
+    worker by default), every worker process reads its ranges from the
+    memory-mapped file itself, and the partial statistics are merged. XML
+    files are always processed in a single process.
+
+    The size of the file and the time for the whole pass are recorded in the
+    statistics.
+    """
+    stats = FieldStats()
+    start = time.perf_counter()
+    with open(infile, "rb") as fh:
+        if workers <= 1 or is_xml(fh):
+            stats.update(iter_records(infile))
+        else:
+            regions = file_regions(infile, regions or 4 * workers)
+            with multiprocessing.Pool(workers) as pool:
+                for partial in pool.imap_unordered(
+                        _region_stats,
+                        [(infile, start, end) for start, end in regions]):
+                    stats.merge(partial)
+    stats.seconds = time.perf_counter() - start
+    stats.bytes = os.path.getsize(infile)
+    return stats
+
+
+def getstats(record_list, filename=None, form="table"):
     """Create some rudimentary stats and write them to a file. If no filename
     is specified, write the output to stdo.
 
     Output contains a count of records in a batch and a table with occurrences
-    of fields and occurring subfields.
+    of fields, occurring subfields and the occurrences of each subfield.
+    record_list is any iterable of records, or a FieldStats object, e.g. from
+    file_stats.
+
+    form is "table" for human readable tables, or "json" or "csv" for machine
+    readable output (see FieldStats.to_json and FieldStats.to_csv).
     """
-    count = 0
+    if isinstance(record_list, FieldStats):
+        stats = record_list
+    else:
+        stats = FieldStats().update(record_list)
+
+    if form in ("json", "csv"):
+        output = stats.to_json() if form == "json" else stats.to_csv()
+        if filename is None:
+            print(output)
+        else:
+            with open(filename, "w", encoding="utf-8", newline="") as fh:
+                fh.write(output)
+        return
+    elif form != "table":
+        raise ValueError(f"Unknown stats format: {form}")
+
     # Table for stats
     table = TT.Texttable()
     # Table for field stats
     field_table = TT.Texttable()
-    field_table.header(["Tag", "Count", "Subfields"])
+    field_table.header(["Tag", "Count", "Subfields", "Subfield counts"])
     field_table.set_deco(TT.Texttable.HEADER)
-    field_table.set_cols_dtype(["t", "i", "t"])
-    field_table.set_cols_align(["l", "r", "l"])
-
-    fieldstat = {}
-    for record in record_list:
-        count += 1
-        for field in record:
-            # FMT and LDR are found in Aleph-Exports
-            if field.is_control_field() or field.tag in ("FMT", "LDR"):
-                fieldstat[field.tag] = fieldstat.get(field.tag, [0, []])
-                fieldstat[field.tag][0] += 1
-            else:
-                tag = field.tag + field.indicators[0].replace(
-                    " ", "#") + field.indicators[1].replace(" ", "#")
-                fieldstat[tag] = fieldstat.get(tag, [0, []])
-                fieldstat[tag][0] += 1
-                subfields = field.subfields
-                for i in range(0, len(subfields), 2):
-                    # subfield codes are evey other element in the list
-                    if subfields[i] not in fieldstat[tag][1]:
-                        fieldstat[tag][1].append(subfields[i])
-                    else:
-                        continue
-
-    for tag in sorted(fieldstat):
-        field_table.add_row(
-            [tag, fieldstat[tag][0],
-             sorted(fieldstat[tag][1])])
-
-    table.add_row(["No. of records", count])
+    field_table.set_cols_dtype(["t", "i", "t", "t"])
+    field_table.set_cols_align(["l", "r", "l", "l"])
+
+    for tag in sorted(stats.fields):
+        codes = sorted(stats.subfield_codes(tag))
+        counts = ", ".join(
+            f"{code}: {stats.subfields[tag][code]}" for code in codes)
+        field_table.add_row([tag, stats.fields[tag], codes, counts])
+
+    table.add_row(["No. of records", stats.records])
+    if stats.bytes is not None:
+        table.add_row(["Bytes processed", stats.bytes])
+    if stats.records_per_second() is not None:
+        table.add_row(
+            ["Records/sec", f"{stats.records_per_second():.0f}"])
 
     if filename is None:
         print(table.draw() + "\n\n" + field_table.draw())
@@ -81,25 +462,107 @@ def getstats(record_list, filename=None):
             fh.write(field_table.draw())
 
 
-def write_to_file(reclist, filename="output", form="bin"):
-    """write records to file"""
-    if form == "bin":
-        filename = filename + ".mrc"
-        with open(filename, "wb") as out:
-            for record in reclist:
-                out.write(record.as_marc())
-    elif form == "xml":
-        filename = filename + ".xml"
-        writer = pymarc.XMLWriter(open(filename, "wb"))
-        for record in reclist:
-            writer.write(record)
-        writer.close()
-    elif form == "text":
-        filename = filename + ".txt"
-        with open(filename, "wt", encoding="utf-8") as out:
-            writer = pymarc.TextWriter(out)
-            for record in reclist:
+class RecordWriter:
+    """Write records incrementally to a file in one of the output forms of
+    write_to_file: MARC transmission format ("bin"), MARC21-XML ("xml") or
+    MARCBreaker ("text"). The extension is added to the filename.
+
+    Serialized records are collected and written in blocks of about
+    `buffer_size` bytes instead of one write per record. Use it as a context
+    manager, so the file is always flushed and closed (and the XML
+    collection element closed):
+
+        with RecordWriter("output", "xml") as writer:
+            for record in records:
                 writer.write(record)
+    """
+
+    extensions = {"bin": ".mrc", "xml": ".xml", "text": ".txt"}
+
+    def __init__(self, filename="output", form="bin", buffer_size=2**20):
+        if form not in self.extensions:
+            raise ValueError(f"Unknown output form: {form}")
+        self.form = form
+        self.filename = filename + self.extensions[form]
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._buffer = []
+        self._buffered = 0
+        if form == "text":
+            self._fh = open(self.filename, "wt", encoding="utf-8")
+            self._empty = ""
+        else:
+            self._fh = open(self.filename, "wb")
+            self._empty = b""
+        if form == "xml":
+            self._append(b'<?xml version="1.0" encoding="UTF-8"?>'
+                         b'<collection xmlns="http://www.loc.gov/MARC21/slim">')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _append(self, data):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write(self, record):
+        """Add a record to the output."""
+        if self.form == "bin":
+            self._append(record.as_marc())
+        elif self.form == "xml":
+            self._append(
+                ET.tostring(pymarc.record_to_xml_node(record),
+                            encoding="utf-8"))
+        else:
+            # a blank line separates the records
+            self._append(str(record) if not self.count else "\n" +
+                         str(record))
+        self.count += 1
+
+    def write_raw(self, data):
+        """Add a record in transmission format as it is, e.g. from
+        iter_mmap_records. Only for the form "bin".
+        """
+        if self.form != "bin":
+            raise ValueError("Raw records can only be written in form bin.")
+        self._append(bytes(data))
+        self.count += 1
+
+    def write_all(self, records):
+        """Add all records from an iterable, e.g. a generator."""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write the buffered records to the file."""
+        if self._buffer:
+            self._fh.write(self._empty.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        """Flush the buffer and close the file."""
+        if self._fh.closed:
+            return
+        if self.form == "xml":
+            self._buffer.append(b"</collection>")
+        self.flush()
+        self._fh.close()
+
+
+def write_to_file(reclist, filename="output", form="bin"):
+    """write records to file
+
+    reclist can be any iterable of records, so a generator pipeline is
+    written without holding all records in memory.
+    """
+    with RecordWriter(filename, form) as writer:
+        writer.write_all(reclist)
 
 
 def change_control_data(field, pos, value):
@@ -139,20 +602,10 @@ def sort_subfields(subfields):
 def remove_isbd(field):
     """Remove ISBD-punctuation at the end of the subfields.
 
-    Takes a field object and changes it in-place.
+    Takes a field object and changes it in-place. Values ending with initials
+    are left as they are. See isbd.IsbdNormalizer for configurable rules.
     """
-    isbd_chars = (".", ",", ":", ";", "/")
-    inlist = [subfield.strip() for subfield in field.subfields]
-    outlist = []
-    for subfield in inlist:
-        if re.search(r'\W[A-Z]\.$', subfield) is not None:
-            # check if field ends with initials, if yes, leave it be
-            outlist.append(subfield)
-        elif subfield.rstrip().endswith(isbd_chars):
-            outlist.append(subfield.rstrip()[:-1].rstrip())
-        else:
-            outlist.append(subfield)
-    field.subfields = outlist
+    isbd_normalizer.normalize(field)
 
 
 def insert_nonfiling_chars(field):
@@ -181,37 +634,41 @@ def insert_nonfiling_chars(field):
 
 
 def relator_terms_to_codes(field):
-    """Replace $$e with a MARC relator term with a $$4 with the corresponding code."""
+    """Replace $$e with a MARC relator term with a $$4 with the corresponding code.
+
+    Every $$e of the field is looked up, with normalized punctuation, case
+    and diacritics (see relators.RelatorResolver). Unknown terms are left in
+    place and counted in relators.relator_resolver.unknown.
+    """
     if field["e"]:
-        existing_codes = [code for code in field.get_subfields("4")]
-        relator_term = field["e"].strip().lower()
-        if relator_term in relators_by_name.keys():
-            code = relators_by_name[relator_term]
-            if code in existing_codes:
-                field.delete_subfield("e")
-                return
-            else:
-                field.add_subfield("4", relators_by_name[relator_term])
-                field.delete_subfield("e")
-        else:
-            print(f"Unknown relator term: {relator_term}")
-    else:
-        return
+        relator_resolver.replace_terms(field)
 
 
 def language_041_from_008(record):
     """Add a field 041##$$a with the language code from 008/35-37. If 041
     already exists, append subfield $$a with the code, if not already present.
     """
-    lang = record["008"].data[35:38]
-    if not record["041"]:
-        record.add_ordered_field(
-            pymarc.Field(tag="041",
-                         indicators=[" ", " "],
-                         subfields=["a", lang]))
+    add_language_041(record, record["008"].data[35:38])
+
+
+def add_language_041(record, lang, fields041=None):
+    """Add the language code `lang` to 041##$$a, see language_041_from_008.
+
+    `fields041` are the fields 041 of the record, if they were already looked
+    up. Return the field 041 that was changed or added.
+    """
+    if fields041 is None:
+        fields041 = record.get_fields("041")
+    if not fields041:
+        field041 = pymarc.Field(tag="041",
+                                indicators=[" ", " "],
+                                subfields=["a", lang])
+        record.add_ordered_field(field041)
     else:
-        if not lang in record["041"].value():
-            record["041"].add_subfield("a", lang)
+        field041 = fields041[0]
+        if not lang in field041.value():
+            field041.add_subfield("a", lang)
+    return field041
 
 
 def country_044_from_008(record):
@@ -220,27 +677,45 @@ def country_044_from_008(record):
     All codes for USA, Canada and Great Britain are normalized to XD-US, XD-CA
     and XA-GB.
     """
-    country008 = record["008"].data[15:18].rstrip()
-    country044 = None
-    if country008 in country_codes_marc2iso:
-        country044 = country_codes_marc2iso[country008]
+    country044 = country_from_008(record["008"].data)
 
     if country044 is not None:
-        if not record["044"]:
-            record.add_ordered_field(
-                pymarc.Field(tag="044",
-                             indicators=[" ", " "],
-                             subfields=["c", country044]))
-        elif country044[3:] in record["044"].subfields:
-            # change existing code to code with continental prefix
-            if not country044 in record["044"].subfields:
-                subfields = []
-                for subfield in record["044"].subfields:
-                    subfields.append(
-                        subfield.replace(country044[3:], country044))
-                record["044"].subfields = subfields
-        else:
-            record["044"].add_subfield("c", country044)
+        add_country_044(record, country044)
+
+
+def country_from_008(data):
+    """Return the ISO 3166-Code for the country code in 008/15-17 (the data
+    of a field 008), or None if it is unknown.
+    """
+    return lookup_tables.country_codes_marc2iso.get(data[15:18].rstrip())
+
+
+def add_country_044(record, country044, fields044=None):
+    """Add the ISO 3166-Code `country044` to 044##$$c, see
+    country_044_from_008.
+
+    `fields044` are the fields 044 of the record, if they were already looked
+    up. Return the field 044 that was changed or added.
+    """
+    if fields044 is None:
+        fields044 = record.get_fields("044")
+    if not fields044:
+        field044 = pymarc.Field(tag="044",
+                                indicators=[" ", " "],
+                                subfields=["c", country044])
+        record.add_ordered_field(field044)
+        return field044
+    field044 = fields044[0]
+    if country044[3:] in field044.subfields:
+        # change existing code to code with continental prefix
+        if not country044 in field044.subfields:
+            subfields = []
+            for subfield in field044.subfields:
+                subfields.append(subfield.replace(country044[3:], country044))
+            field044.subfields = subfields
+    else:
+        field044.add_subfield("c", country044)
+    return field044
 
 
 def get_copyright(rec):
@@ -255,26 +730,37 @@ def get_copyright(rec):
 
 def translate_ill(rec):
     """Translate 300 $$c to german."""
-    if rec["300"]["b"]:
-        ills = rec["300"]["b"].split(", ")
+    translate_ill_field(rec["300"])
+
+
+def translate_ill_field(field):
+    """Translate $$b of a field 300 to german, see translate_ill."""
+    if field["b"]:
+        ills = field["b"].split(", ")
+        terms = lookup_tables.illustration_terms_normalized
         outlist = []
         for ill in ills:
-            if ill.lower() in illustration_terms:
-                if illustration_terms[ill.lower()] is None:
+            term = normalize_illustration_term(ill)
+            if term in terms:
+                if terms[term] is None:
                     continue
                 else:
-                    outlist.append(illustration_terms[ill.lower()])
+                    outlist.append(terms[term])
             else:
                 outlist.append(ill)
         outstring = ", ".join(outlist)
-        rec["300"]["b"] = outstring
+        field["b"] = outstring
 
 
-def nonfiling_articles(field):
+def nonfiling_articles(field, language=None):
     """Insert nonfiling characters in 245 $$a according to a list of articles.
 
     Argument: a pymarc.Field object of a field 245. Assumes capitalisation of the
     first letter in the title. Changes the field in place
+
+    `language` is the language code of the record (008/35-37); if given, only
+    the articles of that language are used (see
+    leading_articles.ArticleMatcher).
     """
 
     # raise an error if a field othen than 245 is passed to this function
@@ -288,6 +774,4 @@ def nonfiling_articles(field):
         insert_nonfiling_chars(field)
         return
 
-    for article in articles:
-        if field["a"].startswith(article + " "):
-            field["a"] = f'<<{article}>>{field["a"][len(article):]}'
+    article_matcher.apply(field, language)
@@ -0,0 +1,103 @@
+"""Resolve relator terms ($e) to MARC relator codes ($4).
+
+The terms of code_dicts.relators_by_name and code_dicts.relator_variants
+are normalized once (case, diacritics, ISBD punctuation, brackets), when
+the lookup tables are compiled (see lookup.py), so variants like "Hrsg.",
+"[Übersetzer]" or "Editor," are found. Lookups are cached, and terms that
+can't be resolved are counted instead of printed.
+"""
+
+import collections
+import functools
+import re
+import unicodedata
+
+import texttable as TT
+
+from pymarc_helpers.lookup import lookup_tables
+
+# punctuation and brackets around a term
+_surrounding_punctuation = re.compile(r"^[\s\[(]+|[\s.,;:/=\])]+$")
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_term(term):
+    """Return a relator term without diacritics, surrounding punctuation,
+    brackets and repeated whitespace, in lower case.
+    """
+    term = unicodedata.normalize("NFKD", term)
+    term = "".join(char for char in term if not unicodedata.combining(char))
+    term = _surrounding_punctuation.sub("", term)
+    return _whitespace.sub(" ", term).casefold()
+
+
+class RelatorResolver:
+    """Look up the relator code for a relator term.
+
+    `codes` maps normalized terms to codes and defaults to
+    lookup_tables.relator_codes, which is loaded on the first lookup.
+    Unknown terms are collected in the Counter `unknown`; report returns them
+    as a table.
+    """
+
+    def __init__(self, cache_size=4096, codes=None):
+        self._codes = codes
+        self.unknown = collections.Counter()
+        self._lookup = functools.lru_cache(maxsize=cache_size)(self._resolve)
+
+    @property
+    def codes(self):
+        if self._codes is None:
+            self._codes = lookup_tables.relator_codes
+        return self._codes
+
+    def _resolve(self, term):
+        return self.codes.get(normalize_term(term))
+
+    def resolve(self, term):
+        """Return the relator code for a term, or None if it is unknown."""
+        code = self._lookup(term)
+        if code is None:
+            self.unknown[term.strip()] += 1
+        return code
+
+    def replace_terms(self, field):
+        """Replace every $$e with a known relator term by a $$4 with the
+        corresponding code, unless the field already has that code. $$e with
+        unknown terms are left as they are.
+        """
+        existing_codes = field.get_subfields("4")
+        subfields = []
+        new_codes = []
+        for i in range(0, len(field.subfields), 2):
+            code, value = field.subfields[i:i + 2]
+            if code == "e":
+                relator_code = self.resolve(value)
+                if relator_code is not None:
+                    if (relator_code not in existing_codes
+                            and relator_code not in new_codes):
+                        new_codes.append(relator_code)
+                    continue
+            subfields.extend((code, value))
+        for relator_code in new_codes:
+            subfields.extend(("4", relator_code))
+        field.subfields = subfields
+
+    def report(self):
+        """Return a table with the unknown terms and how often they
+        occurred, or an empty string if there were none.
+        """
+        if not self.unknown:
+            return ""
+        table = TT.Texttable()
+        table.header(["Unknown relator term", "Count"])
+        table.set_deco(TT.Texttable.HEADER)
+        table.set_cols_dtype(["t", "i"])
+        table.set_cols_align(["l", "r"])
+        for term, count in self.unknown.most_common():
+            table.add_row([term, count])
+        return table.draw()
+
+
+# used by pymarc_helpers.relator_terms_to_codes
+relator_resolver = RelatorResolver()
@@ -0,0 +1,126 @@
+"""Split a MARC file into balanced shards.
+
+Binary input is indexed first (see index.MarcIndex, without control
+numbers, so the records are skipped, not read) to find shard boundaries
+balanced by record count or by bytes. Every shard is a contiguous range of
+the input and is written independently, in parallel with several workers.
+For binary output the byte range is copied as it is, without decoding the
+records; for XML and text output the records of the range are decoded from
+the memory-mapped file.
+
+XML input is counted in a first pass and split by record count in a second
+one, in a single process.
+
+    split_file("batch.mrc", 4, form="bin")
+"""
+
+import bisect
+import multiprocessing
+
+from pymarc_helpers.index import MarcIndex
+from pymarc_helpers.pymarc_helpers import (RecordWriter, decode_record,
+                                           is_xml, iter_mmap_records,
+                                           iter_xml_records)
+
+SPLIT_BY = ("count", "bytes")
+
+
+def shard_bounds(offsets, parts, by="count"):
+    """Return the record numbers where the shards begin and the number of
+    records, as a list of parts + 1 ascending numbers.
+
+    `offsets` are the byte offsets of the records and the end of the last
+    one (see MarcIndex). Shards are balanced by record count or by bytes.
+    There are never more shards than records.
+    """
+    if by not in SPLIT_BY:
+        raise ValueError(f"Unknown split mode: {by}")
+    count = len(offsets) - 1
+    parts = max(1, min(parts, count))
+    if by == "count":
+        return [count * i // parts for i in range(parts + 1)]
+    total = offsets[-1] - offsets[0]
+    bounds = [0]
+    for i in range(1, parts):
+        target = offsets[0] + total * i // parts
+        # the record nearest to the target, at least one record per shard
+        n = bisect.bisect_left(offsets, target, 0, count)
+        if n > 0 and target - offsets[n - 1] < offsets[n] - target:
+            n -= 1
+        bounds.append(min(max(n, bounds[-1] + 1), count - parts + i))
+    bounds.append(count)
+    return bounds
+
+
+def shard_filename(outfile_base, number):
+    """Return the name of a shard (without extension)."""
+    return f"{outfile_base}_{number:03d}"
+
+
+def _write_range(task):
+    """Write the bytes start:end of a binary MARC file as a shard. Return the
+    filename and the number of records written.
+    """
+    infile, start, end, records, filename, form = task
+    if form == "bin":
+        filename += RecordWriter.extensions["bin"]
+        with open(infile, "rb") as fh, open(filename, "wb") as out:
+            fh.seek(start)
+            remaining = end - start
+            while remaining:
+                block = fh.read(min(remaining, 2**20))
+                out.write(block)
+                remaining -= len(block)
+        return filename, records
+    with RecordWriter(filename, form) as writer:
+        for raw in iter_mmap_records(infile, start, end):
+            record = decode_record(raw)
+            if record is not None:
+                writer.write(record)
+    return writer.filename, writer.count
+
+
+def split_file(infile, parts, outfile_base="output", form="bin", by="count",
+               workers=1):
+    """Split a MARC file (binary or xml) into `parts` shards in the format
+    `form` (see RecordWriter), named by shard_filename. Return a list of
+    (filename, number of records)-tuples.
+    """
+    if form not in RecordWriter.extensions:
+        raise ValueError(f"Unknown output form: {form}")
+    with open(infile, "rb") as fh:
+        xml = is_xml(fh)
+    if xml:
+        return _split_xml(infile, parts, outfile_base, form)
+
+    offsets = MarcIndex.build(infile, with_ids=False).offsets
+    if len(offsets) == 1:
+        return []
+    bounds = shard_bounds(offsets, parts, by)
+    tasks = [(infile, offsets[first], offsets[last], last - first,
+              shard_filename(outfile_base, number), form)
+             for number, (first, last) in enumerate(zip(bounds, bounds[1:]))]
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            return pool.map(_write_range, tasks)
+    return [_write_range(task) for task in tasks]
+
+
+def _split_xml(infile, parts, outfile_base, form):
+    # the records of an XML file can't be found without parsing it, so
+    # count them first
+    with open(infile, "rb") as fh:
+        count = sum(1 for _ in iter_xml_records(fh))
+    if not count:
+        return []
+    bounds = shard_bounds(range(count + 1), parts)
+    shards = []
+    with open(infile, "rb") as fh:
+        records = iter_xml_records(fh)
+        for number, (first, last) in enumerate(zip(bounds, bounds[1:])):
+            with RecordWriter(shard_filename(outfile_base, number),
+                              form) as writer:
+                for _ in range(last - first):
+                    writer.write(next(records))
+            shards.append((writer.filename, writer.count))
+    return shards
@@ -10,6 +10,7 @@ config = {
     'version': "0.2",
     'install_requires': ['pytest', 'pymarc == 4.2.1', 'texttable'],
     'packages': ["pymarc_helpers"],
+    'package_data': {"pymarc_helpers": ["data/*.json"]},
     'scripts': [],
     'name': 'pymarc_helpers',
     'entry_points': {
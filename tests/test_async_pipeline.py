@@ -0,0 +1,33 @@
+import concurrent.futures
+
+import pytest
+from pymarc_helpers.async_pipeline import AsyncPipeline
+
+
+def double(chunk):
+    return [x * 2 for x in chunk]
+
+
+def test_pipeline_preserves_order():
+    chunks = [list(range(i, i + 10)) for i in range(0, 1000, 10)]
+    written = []
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        pipeline = AsyncPipeline(iter(chunks), double, written.extend,
+                                 executor, queue_size=3)
+        pipeline.run()
+
+    assert written == [x * 2 for x in range(1000)]
+    assert [stage.records for stage in pipeline.stages] == [1000] * 3
+    assert all(stage.max_depth <= 3 for stage in pipeline.stages)
+    assert "Total: 1000 records" in pipeline.report()
+
+
+def test_pipeline_errors():
+
+    def fail(chunk):
+        raise ValueError("broken")
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        pipeline = AsyncPipeline([[1], [2]], fail, print, executor)
+        with pytest.raises(ValueError):
+            pipeline.run()
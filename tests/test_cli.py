@@ -0,0 +1,149 @@
+import os
+import sys
+
+import pytest
+
+import pymarc_helpers as ph
+from pymarc_helpers import cli
+
+
+def test_process_parallel(tmp_path, capsys):
+    script = tmp_path / "script.py"
+    script.write_text(
+        "def process_record(rec):\n"
+        "    if rec['001'].data == '990000141780203339':\n"
+        "        raise ValueError('broken record')\n"
+        "    rec['245']['a'] = 'processed'\n"
+        "    return rec\n")
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+
+    processed = list(
+        cli.process_parallel(iter(records), str(script), 2, chunksize=5))
+
+    # the failing record is left out, the order is preserved
+    assert [ph.control_number(rec) for rec in processed
+            ] == [ph.control_number(rec) for rec in records[1:]]
+    assert all(rec["245"]["a"] == "processed" for rec in processed)
+    assert "record 0 failed" in capsys.readouterr().err
+
+
+def test_lazy_run_reports_modified(tmp_path, monkeypatch, capsys):
+    infile = os.path.abspath("tests/testdata/bindata.mrc")
+    script = tmp_path / "script.py"
+    script.write_text(
+        "def process_record(rec):\n"
+        "    if 'Python' in rec['245']['a']:\n"
+        "        rec['245']['a'] = 'processed'\n"
+        "    return rec\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", [
+        "pymarc_helpers", "-i", infile, "-f", str(script), "--run-all",
+        "--output-format", "bin", "--lazy", "-o", "out.mrc"
+    ])
+
+    cli.main()
+
+    with open(infile, "rb") as fh:
+        raws = list(ph.iter_raw_records(fh))
+    with open(tmp_path / "out.mrc", "rb") as fh:
+        written = list(ph.iter_raw_records(fh))
+    changed = [raw != new for raw, new in zip(raws, written)]
+    assert len(written) == len(raws)
+    assert f"20 records processed, {sum(changed)} modified" in (
+        capsys.readouterr().err)
+    assert 0 < sum(changed) < len(raws)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_async(tmp_path, capsys, workers):
+    script = tmp_path / "script.py"
+    script.write_text(
+        "def process_record(rec):\n"
+        "    if rec['001'].data == '990000141780203339':\n"
+        "        raise ValueError('broken record')\n"
+        "    rec['245']['a'] = 'processed'\n"
+        "    return rec\n")
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+    processed = []
+
+    pipeline = cli.process_async(iter(records),
+                                 cli.load_process_record(str(script)),
+                                 processed.extend, str(script), workers,
+                                 queue_size=2, chunksize=5)
+
+    assert [ph.control_number(rec) for rec in processed
+            ] == [ph.control_number(rec) for rec in records[1:]]
+    assert all(rec["245"]["a"] == "processed" for rec in processed)
+    assert "record 0 failed" in capsys.readouterr().err
+    assert pipeline.stages[-1].records == len(records)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_broken_input_record(tmp_path, capsys, workers):
+    script = tmp_path / "script.py"
+    script.write_text("def process_record(rec):\n"
+                      "    return rec\n")
+    with open("tests/testdata/bindata_short.mrc", "rb") as fh:
+        raws = list(ph.iter_raw_records(fh))[:3]
+    # corrupt the record length of the middle record
+    infile = tmp_path / "broken.mrc"
+    infile.write_bytes(raws[0] + b"xxxxx" + raws[1][5:] + raws[2])
+    records = list(ph.iter_records(str(infile)))
+    assert records[1] is None
+
+    processed = list(
+        cli.process_parallel(iter(records), str(script), workers,
+                             chunksize=2))
+    assert len(processed) == 2
+    assert "record 1 failed (broken record)" in capsys.readouterr().err
+
+    processed = []
+    cli.process_async(iter(records), cli.load_process_record(str(script)),
+                      processed.extend, str(script), workers, chunksize=2)
+    assert len(processed) == 2
+    assert "record 1 failed (broken record)" in capsys.readouterr().err
+
+
+def test_lazy_run_xml_has_no_modified_count(tmp_path, monkeypatch, capsys):
+    infile = os.path.abspath("tests/testdata/xmldata_short.xml")
+    script = tmp_path / "script.py"
+    script.write_text("def process_record(rec):\n"
+                      "    return rec\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", [
+        "pymarc_helpers", "-i", infile, "-f", str(script), "--run-all",
+        "--output-format", "bin", "--lazy", "-o", "out.mrc"
+    ])
+
+    cli.main()
+
+    err = capsys.readouterr().err
+    assert "records processed" in err
+    assert "modified" not in err
+
+
+@pytest.mark.parametrize("options", [[], ["--lazy"]])
+def test_broken_input_record_same_for_all_worker_counts(
+        tmp_path, monkeypatch, capsys, options):
+    with open("tests/testdata/bindata_short.mrc", "rb") as fh:
+        raws = list(ph.iter_raw_records(fh))[:3]
+    infile = tmp_path / "broken.mrc"
+    infile.write_bytes(raws[0] + b"xxxxx" + raws[1][5:] + raws[2])
+    script = tmp_path / "script.py"
+    script.write_text("def process_record(rec):\n"
+                      "    rec['245']['a'] = 'processed'\n"
+                      "    return rec\n")
+    monkeypatch.chdir(tmp_path)
+
+    outputs = []
+    for workers in ("1", "2"):
+        monkeypatch.setattr(sys, "argv", [
+            "pymarc_helpers", "-i", str(infile), "-f", str(script),
+            "--run-all", "--output-format", "bin", "-w", workers, "-o",
+            f"out{workers}.mrc", *options
+        ])
+        cli.main()
+        assert "record 1 failed (broken record)" in capsys.readouterr().err
+        outputs.append((tmp_path / f"out{workers}.mrc").read_bytes())
+    assert outputs[0] == outputs[1]
+    assert len(ph.batch_to_list(str(tmp_path / "out1.mrc"))) == 2
@@ -0,0 +1,30 @@
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers import columnar
+
+
+def test_export_and_load(tmp_path):
+    outfile = str(tmp_path / "batch.marccol")
+    records = ph.batch_to_list("tests/testdata/xmldata_short.xml")
+
+    assert columnar.export_columnar("tests/testdata/xmldata_short.xml",
+                                    outfile,
+                                    chunk_size=10) == 72
+    meta = columnar.read_meta(outfile)
+    assert meta["chunks"] == 8
+    assert meta["records"] == 72
+
+    columns = columnar.load_columns(outfile)
+    expected = [
+        row for number, rec in enumerate(records)
+        for row in columnar.flatten_record(rec, number)
+    ]
+    assert list(zip(*columns.values())) == expected
+
+    some = columnar.load_columns(outfile, ["tag", "value"])
+    assert list(some) == ["tag", "value"]
+    assert some["tag"][:3] == ["LDR", "001", "003"]
+    assert some["value"][1] == "990000141780203339"
+
+    with pytest.raises(ValueError):
+        columnar.load_columns(outfile, ["no such column"])
@@ -0,0 +1,147 @@
+import pymarc
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers.compact import (CompactField, CompactRecord,
+                                    decode_compact, iter_compact_records)
+
+
+def process_record(rec):
+    for field in rec.get_fields("245", "264", "300"):
+        ph.remove_isbd(field)
+    for field in rec.get_fields("100", "700"):
+        ph.relator_terms_to_codes(field)
+    ph.nonfiling_articles(rec["245"])
+    ph.language_041_from_008(rec)
+    ph.country_044_from_008(rec)
+    ph.change_control_data(rec["008"], "0-5", "200101")
+    return rec
+
+
+@pytest.mark.parametrize("infile", [
+    "tests/testdata/bindata_short.mrc", "tests/testdata/bindata.mrc",
+    "tests/testdata/xmldata_short.xml"
+])
+def test_compact_records_match_pymarc(infile):
+    records = ph.batch_to_list(infile)
+    compact = list(iter_compact_records(infile))
+
+    assert [str(rec) for rec in compact] == [str(rec) for rec in records]
+    assert [rec.as_marc() for rec in compact
+            ] == [rec.as_marc() for rec in records]
+
+    # the helpers work on compact records
+    assert [process_record(rec).as_marc() for rec in compact
+            ] == [process_record(rec).as_marc() for rec in records]
+
+
+def test_lazy_decoding():
+    raw = ph.batch_to_list("tests/testdata/bindata_short.mrc")[0].as_marc()
+    record = CompactRecord.from_marc(raw)
+
+    assert not hasattr(record, "__dict__")
+    assert not any(field.is_decoded() for field in record.fields)
+    assert record["245"]["a"].startswith("8th International")
+    assert [field.tag for field in record.fields
+            if field.is_decoded()] == ["245"]
+    assert record["001"].data == "990000141780203339"
+
+
+def test_conversion():
+    record = ph.batch_to_list("tests/testdata/bindata_short.mrc")[0]
+    compact = CompactRecord.from_record(record)
+    back = compact.to_record()
+
+    assert isinstance(back, pymarc.Record)
+    assert all(isinstance(field, pymarc.Field) for field in back.fields)
+    assert back.as_marc() == record.as_marc()
+    # changes don't affect the original
+    compact["245"]["a"] = "changed"
+    assert record["245"]["a"] != "changed"
+
+
+def test_compact_field():
+    field = CompactField("245", ["1", "0"], ["a", "Titel :", "b", "Zusatz"])
+    ph.remove_isbd(field)
+
+    assert field.subfields == ["a", "Titel", "b", "Zusatz"]
+    assert str(field) == "=245  10$aTitel$bZusatz"
+    assert field.to_field().subfields == field.subfields
+
+
+def test_untouched_fields_are_copied():
+    with open("tests/testdata/bindata.mrc", "rb") as fh:
+        raws = list(ph.iter_raw_records(fh))
+    records = [CompactRecord.from_marc(raw) for raw in raws]
+
+    # nothing decoded: the records are written as they were read
+    assert [rec.as_marc() for rec in records] == raws
+
+    record = records[0]
+    record["245"]["a"] = "Changed"
+    marc = record.as_marc()
+    assert marc != raws[0]
+    assert not record["100"] or not record["100"].is_decoded()
+    assert pymarc.Record(marc)["245"]["a"] == "Changed"
+
+
+def test_change_tracking():
+    with open("tests/testdata/bindata.mrc", "rb") as fh:
+        raw = next(ph.iter_raw_records(fh))
+    record = CompactRecord.from_marc(raw)
+
+    # reading and helpers without effect leave the record unchanged
+    record["245"]["a"]
+    ph.change_control_data(record["008"], "0-5", record["008"].data[0:6])
+    assert not record.is_modified()
+    assert not ph.clone_record(record).is_modified()
+    ph.remove_isbd(record["245"])
+    ph.remove_isbd(record["245"])
+    assert record.is_modified()
+
+    record = CompactRecord.from_marc(raw)
+    record["245"].subfields[1] = record["245"].subfields[1]
+    assert not record.is_modified()
+    assert record.as_marc() == raw
+    record["245"].add_subfield("n", "1")
+    assert record.is_modified()
+    assert [field.tag for field in record.fields
+            if field.is_modified()] == ["245"]
+
+    record = CompactRecord.from_marc(raw)
+    record.add_field(pymarc.Field("500", [" ", " "], ["a", "Note"]))
+    assert record.is_modified()
+    record = CompactRecord.from_marc(raw)
+    record.leader = record.leader[:5] + "d" + record.leader[6:]
+    assert record.is_modified()
+
+
+def test_broken_records_are_rejected():
+    with open("tests/testdata/bindata_short.mrc", "rb") as fh:
+        raw = next(ph.iter_raw_records(fh))
+    assert raw[9:10] == b"a"
+    # invalid UTF-8 in the data of the last field
+    invalid_utf8 = raw[:-3] + b"\xff" + raw[-2:]
+    broken = [
+        raw[:-50], raw[:-1], b"xxxxx" + raw[5:],
+        b"%05d" % (len(raw) + 3) + raw[5:], invalid_utf8
+    ]
+
+    for data in broken:
+        assert ph.decode_record(data) is None
+        assert decode_compact(data) is None
+    with pytest.raises(pymarc.exceptions.RecordLengthInvalid):
+        CompactRecord.from_marc(b"%05d" % (len(raw) + 3) + raw[5:])
+    with pytest.raises(pymarc.exceptions.EndOfRecordNotFound):
+        CompactRecord.from_marc(raw[:-50])
+
+
+def test_iter_compact_records_resyncs(tmp_path):
+    with open("tests/testdata/bindata_short.mrc", "rb") as fh:
+        raws = list(ph.iter_raw_records(fh))[:3]
+    infile = tmp_path / "broken.mrc"
+    infile.write_bytes(raws[0] + b"xxxxx" + raws[1][5:] + raws[2])
+
+    compact = list(iter_compact_records(str(infile)))
+    records = list(ph.iter_records(str(infile)))
+    assert [rec is None for rec in compact] == [False, True, False]
+    assert compact[2].as_marc() == records[2].as_marc() == raws[2]
@@ -0,0 +1,49 @@
+import pymarc
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers import fixed_fields as ff
+
+
+def test_fixed_field_column():
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+    records.append(pymarc.Record())
+
+    languages = ff.fixed_field_column(records, "008", "35-37")
+    assert languages[0] == "eng"
+    assert languages[-1] is None
+    assert ff.fixed_field_column(records, "LDR", "6")[0] == "a"
+
+    with pytest.raises(ValueError):
+        ff.fixed_field_column(records, "008", "1-2-3")
+
+
+def test_map_column():
+    column = ["gw ", "xxu", "gw ", "zz ", None]
+    assert ff.map_column(column, ph.country_codes_marc2iso,
+                         strip=True) == ["XA-DE", "XD-US", "XA-DE", None, None]
+
+
+def test_set_fixed_field_column():
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")[:3]
+
+    ff.set_fixed_field_column(records, "008", "35-37", ["fre", None, "ita"])
+    ff.set_fixed_field_column(records, "LDR", "17", ["7", "7", "7"])
+
+    assert [rec["008"].data[35:38] for rec in records][::2] == ["fre", "ita"]
+    assert records[1]["008"].data[35:38] != "fre"
+    assert all(rec.leader[17] == "7" for rec in records)
+    assert all(len(rec["008"].data) == 40 for rec in records)
+
+
+def test_batch_helpers_match_helpers():
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+    expected = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+
+    ff.batch_language_041_from_008(records)
+    ff.batch_country_044_from_008(records)
+    for rec in expected:
+        ph.language_041_from_008(rec)
+        ph.country_044_from_008(rec)
+
+    assert [rec.as_marc() for rec in records
+            ] == [rec.as_marc() for rec in expected]
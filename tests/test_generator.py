@@ -0,0 +1,54 @@
+import pymarc_helpers as ph
+from pymarc_helpers.generator import generate_file, generate_records
+
+
+def test_generate_records():
+    records = list(generate_records(50, seed=1))
+
+    assert len(records) == 50
+    assert len({ph.control_number(rec) for rec in records}) == 50
+    assert all(len(rec["008"].data) == 40 for rec in records)
+    # reproducible
+    assert [rec.as_marc() for rec in generate_records(50, seed=1)
+            ] == [rec.as_marc() for rec in records]
+    assert [rec.as_marc() for rec in generate_records(50, seed=2)
+            ] != [rec.as_marc() for rec in records]
+
+
+def test_generate_file(tmp_path):
+    for form in ("bin", "xml"):
+        filename = generate_file(str(tmp_path / "synthetic"), 20, form)
+        assert [rec.as_marc() for rec in ph.iter_records(filename)
+                ] == [rec.as_marc() for rec in generate_records(20)]
+
+
+def test_realistic_records():
+    records = list(generate_records(500, seed=3))
+
+    for rec in records:
+        assert rec["008"].data[15:18].rstrip() in ph.country_codes_marc2iso
+        assert rec["008"].data[35:38] in ("ger", "eng", "fre", "ita")
+    titles = [rec["245"]["a"] for rec in records]
+    assert any(title.split()[0] in ph.articles for title in titles)
+    assert any(rec["245"].indicators[1] != "0" for rec in records)
+    assert any(rec["300"]["b"] for rec in records)
+    # the helpers work on them
+    for rec in records:
+        ph.nonfiling_articles(rec["245"])
+        ph.translate_ill(rec)
+        ph.relator_terms_to_codes(rec["100"])
+        ph.country_044_from_008(rec)
+    assert any(rec["245"]["a"].startswith("<<") for rec in records)
+    assert any(rec["100"]["4"] for rec in records)
+
+
+def test_nonfiling_indicator_matches_article():
+    titles = [(rec["245"]["a"], int(rec["245"].indicators[1]))
+              for rec in generate_records(2000, seed=4)]
+
+    assert any(title.startswith("D'") for title, _ in titles)
+    assert not any(title.startswith("D' ") for title, _ in titles)
+    for title, nonfiling in titles:
+        if nonfiling:
+            assert title[:nonfiling].rstrip() in ph.articles
+            assert title[nonfiling - 1] in " '"
@@ -0,0 +1,89 @@
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers.index import MarcIndex, MarcIndexError, random_sample
+
+
+@pytest.fixture
+def marcfile(tmp_path):
+    infile = tmp_path / "batch.mrc"
+    infile.write_bytes(
+        open("tests/testdata/bindata_short.mrc", "rb").read())
+    return str(infile)
+
+
+def test_build_and_load_index(marcfile):
+    records = ph.batch_to_list(marcfile)
+    index = MarcIndex.open(marcfile)
+
+    assert len(index) == 72
+    assert index.record(10).as_marc() == records[10].as_marc()
+    assert index.find(ph.control_number(records[42])) == 42
+    assert index.find("no such record") is None
+
+    loaded = MarcIndex.load(marcfile)
+    assert list(loaded.offsets) == list(index.offsets)
+    assert loaded.ids == index.ids
+
+    # changing the file invalidates the index
+    with open(marcfile, "ab") as fh:
+        fh.write(records[0].as_marc())
+    with pytest.raises(MarcIndexError):
+        MarcIndex.load(marcfile)
+    assert len(MarcIndex.open(marcfile)) == 73
+
+
+def test_xml_cannot_be_indexed():
+    with pytest.raises(MarcIndexError):
+        MarcIndex.build("tests/testdata/xmldata_short.xml")
+
+
+def test_random_sample(marcfile):
+    ids = [ph.control_number(rec) for rec in ph.batch_to_list(marcfile)]
+    sample = random_sample(marcfile, 10, seed=1)
+    xml_sample = random_sample("tests/testdata/xmldata_short.xml", 10, seed=1)
+
+    for records in (sample, xml_sample):
+        sample_ids = [ph.control_number(rec) for rec in records]
+        assert len(set(sample_ids)) == 10
+        # file order is kept
+        assert sample_ids == sorted(sample_ids, key=ids.index)
+    assert len(random_sample(marcfile, 100)) == 72
+
+
+def test_broken_record_length(tmp_path):
+    with open("tests/testdata/bindata_short.mrc", "rb") as fh:
+        raws = list(ph.iter_raw_records(fh))[:3]
+    infile = tmp_path / "broken.mrc"
+    infile.write_bytes(raws[0] + b"xxxxx" + raws[1][5:] + raws[2])
+
+    index = MarcIndex.build(str(infile))
+    # the scan continues after the broken record, as iter_records does
+    assert len(index) == 3
+    assert index.record(1) is None
+    assert index.record(2).as_marc() == raws[2]
+    assert len(random_sample(str(infile), 10)) == 2
+
+
+def test_index_not_saved(marcfile, monkeypatch):
+    def save(self, index_file=None):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(MarcIndex, "save", save)
+    assert len(MarcIndex.open(marcfile)) == 72
+    assert len(random_sample(marcfile, 5)) == 5
+
+
+@pytest.mark.parametrize("size", [10, 30, 60, 600])
+def test_truncated_index_file(marcfile, size):
+    index = MarcIndex.open(marcfile)
+    index_file = marcfile + ".idx"
+    with open(index_file, "rb") as fh:
+        data = fh.read()
+    with open(index_file, "wb") as fh:
+        fh.write(data[:size])
+
+    with pytest.raises(MarcIndexError):
+        MarcIndex.load(marcfile)
+    # rebuilt
+    assert list(MarcIndex.open(marcfile).offsets) == list(index.offsets)
+    assert len(random_sample(marcfile, 5)) == 5
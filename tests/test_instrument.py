@@ -0,0 +1,37 @@
+import pymarc_helpers
+from pymarc_helpers import pymarc_helpers as helpers
+from pymarc_helpers.instrument import Instrumentation
+
+
+def test_instrumentation(tmp_path):
+    original = pymarc_helpers.nonfiling_articles
+    instrumentation = Instrumentation(str(tmp_path / "profile.out"))
+    instrumentation.install()
+    try:
+        # scripts import the helpers after install
+        from pymarc_helpers import nonfiling_articles, remove_isbd
+
+        def process_record(rec):
+            remove_isbd(rec["245"])
+            nonfiling_articles(rec["245"])
+            return rec
+
+        process_record = instrumentation.wrap_process_record(process_record)
+        instrumentation.start()
+        for rec in pymarc_helpers.iter_records(
+                "tests/testdata/bindata_short.mrc"):
+            process_record(rec)
+        instrumentation.stop()
+    finally:
+        instrumentation.uninstall()
+
+    assert pymarc_helpers.nonfiling_articles is original
+    assert helpers.nonfiling_articles is original
+    assert instrumentation.records == 72
+    assert instrumentation.fields > 72
+    assert instrumentation.calls["process_record"] == 72
+    assert instrumentation.calls["remove_isbd"] == 72
+    assert instrumentation.calls["nonfiling_articles"] == 72
+    summary = instrumentation.summary()
+    assert "nonfiling_articles" in summary
+    assert (tmp_path / "profile.out").exists()
@@ -0,0 +1,71 @@
+import pymarc
+import pytest
+from pymarc_helpers.isbd import (ABBREVIATIONS, DEFAULT_RULES, INITIALS,
+                                 IsbdNormalizer)
+
+
+def title_field(*subfields):
+    return pymarc.Field(tag="245", indicators=["1", "0"],
+                        subfields=list(subfields))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Haupttitel :", "Haupttitel"),
+    ("Titel / ", "Titel"),
+    ("Wien ;", "Wien"),
+    ("Hunt, A.", "Hunt, A."),
+    ("[2020]", "[2020]"),
+    ("", ""),
+])
+def test_normalize_value(value, expected):
+    assert IsbdNormalizer().normalize_value(value) == expected
+
+
+def test_codes_are_not_changed():
+    normalizer = IsbdNormalizer({(None, None): {"strip": "a", "keep": []}})
+    field = title_field("a", "Kafka", "b", "Mann")
+    normalizer.normalize(field)
+    assert field.subfields == ["a", "Kafk", "b", "Mann"]
+
+
+def test_rules_per_tag_and_code():
+    normalizer = IsbdNormalizer({
+        **DEFAULT_RULES,
+        ("245", "c"): {
+            "strip": ".,:;/",
+            "keep": [INITIALS, ABBREVIATIONS],
+        },
+        ("300", None): {
+            "strip": ":;",
+        },
+    })
+    field = title_field("a", "Titel /", "b", "Zusatz etc.", "c",
+                        "Anna Huber [et al.]")
+    normalizer.normalize(field)
+    assert field.subfields == [
+        "a", "Titel", "b", "Zusatz etc", "c", "Anna Huber [et al.]"
+    ]
+
+    field = pymarc.Field(tag="300", indicators=[" ", " "],
+                         subfields=["a", "200 S. :", "c", "24 cm."])
+    normalizer.normalize_fields([field])
+    assert field.subfields == ["a", "200 S.", "c", "24 cm."]
+
+
+def test_rule_fallback():
+    default = {"strip": "."}
+    by_code = {"strip": ":"}
+    by_tag = {"strip": "/"}
+    normalizer = IsbdNormalizer({
+        (None, None): default,
+        (None, "b"): by_code,
+        ("245", None): by_tag,
+    })
+    assert normalizer.rule("245", "b") == (("/", ), None)
+    assert normalizer.rule("264", "b") == ((":", ), None)
+    assert normalizer.rule("264", "a") == ((".", ), None)
+
+
+def test_default_rule_required():
+    with pytest.raises(ValueError):
+        IsbdNormalizer({("245", "c"): {"strip": "."}})
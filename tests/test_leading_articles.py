@@ -0,0 +1,56 @@
+import pymarc
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers.leading_articles import ArticleMatcher
+from pymarc_helpers.fixed_fields import batch_nonfiling_articles
+
+
+def title_field(title):
+    return pymarc.Field(tag="245", indicators=["1", "0"],
+                        subfields=["a", title])
+
+
+@pytest.mark.parametrize("title, language, expected", [
+    ("Die Geschichte", None, "Die"),
+    ("Die Geschichte", "ger", "Die"),
+    ("Die hard", "eng", None),
+    ("Eine Geschichte", "ger", "Eine"),
+    ("Einer von uns", "ger", "Einer"),
+    ("The story", "eng", "The"),
+    ("The story", "ita", "The"),
+    ("Theory", "eng", None),
+    ("Diet", None, None),
+])
+def test_match(title, language, expected):
+    assert ArticleMatcher().match(title, language) == expected
+
+
+def test_strict():
+    matcher = ArticleMatcher(strict=True)
+    assert matcher.match("The story", "ita") is None
+    assert matcher.match("The story", "eng") == "The"
+
+
+def test_apply_counts():
+    matcher = ArticleMatcher()
+    field = title_field("Der Titel")
+
+    assert matcher.apply(field, "ger") == "Der"
+    assert field["a"] == "<<Der>> Titel"
+    # already marked
+    assert matcher.apply(field, "ger") is None
+    assert matcher.applied == {("ger", "Der"): 1}
+    assert "Der" in matcher.report()
+
+
+def test_batch_nonfiling_articles():
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")[:2]
+    for record, (title, lang) in zip(records, [("Die Welt", "ger"),
+                                               ("Die hard", "eng")]):
+        record["245"].indicators[1] = "0"
+        record["245"]["a"] = title
+        ph.change_control_data(record["008"], "35-37", lang)
+
+    batch_nonfiling_articles(records)
+
+    assert [rec["245"]["a"] for rec in records] == ["<<Die>> Welt", "Die hard"]
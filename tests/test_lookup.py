@@ -0,0 +1,68 @@
+import json
+import shutil
+
+import pymarc
+import pymarc_helpers as ph
+from pymarc_helpers.lookup import (TABLES_FILE, LookupTables, build_lookup,
+                                   lookup_tables)
+
+
+def test_lookup_file_is_current():
+    # run python -m pymarc_helpers.compile_lookup after editing the tables
+    assert lookup_tables.is_current()
+
+
+def test_maps():
+    assert lookup_tables.relator_codes["hrsg"] == "edt"
+    assert lookup_tables.relator_codes["edt"] == "edt"
+    assert "editor" in lookup_tables.relator_terms["edt"]
+    assert lookup_tables.country_codes_iso2marc["XA-AT"] == "au"
+    assert lookup_tables.illustration_terms_normalized["maps"] == "Karten"
+    assert ph.country_codes_marc2iso["au"] == "XA-AT"
+    assert "Die" in ph.articles and "The" in ph.articles
+
+
+def test_outdated_lookup_file(tmp_path):
+    tables_file = tmp_path / "code_tables.json"
+    lookup_file = tmp_path / "lookup.json"
+    shutil.copy(TABLES_FILE, tables_file)
+
+    tables = LookupTables(tables_file, lookup_file)
+    assert tables.compiled is None
+    assert tables.relator_codes["hrsg"] == "edt"
+    assert tables.compiled is False
+
+    build_lookup(tables_file, lookup_file)
+    assert LookupTables(tables_file, lookup_file).is_current()
+
+    # edited, but not compiled
+    with open(tables_file, encoding="utf-8") as fh:
+        data = json.load(fh)
+    data["relator_variants"]["bearb"] = "edt"
+    with open(tables_file, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    tables = LookupTables(tables_file, lookup_file)
+    assert not tables.is_current()
+    assert tables.relator_codes["bearb"] == "edt"
+    assert tables.compiled is False
+
+
+def test_translate_ill_normalized_terms():
+    rec = pymarc.Record()
+    rec.add_field(
+        pymarc.Field(tag="300",
+                     indicators=[" ", " "],
+                     subfields=["a", "200 S.", "b", "Maps , tables, Noten"]))
+    ph.translate_ill(rec)
+    assert rec["300"]["b"] == "Karten, Noten"
+
+
+def test_star_import_exports_tables():
+    namespace = {}
+    exec("from pymarc_helpers import *", namespace)
+    for name in ("relators_by_name", "relator_variants",
+                 "country_codes_marc2iso", "illustration_terms",
+                 "articles_by_language", "articles", "remove_isbd"):
+        assert name in namespace
+    assert namespace["articles"] == ph.articles
+    assert ph.pymarc_helpers.relators_by_name is ph.relators_by_name
@@ -0,0 +1,44 @@
+import pymarc
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers.merge import dedupe_key, merge_files
+
+
+@pytest.fixture
+def vendor_files(tmp_path):
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")[:4]
+    first = tmp_path / "first"
+    ph.write_to_file(records[:3], str(first), "bin")
+    # the second file repeats record 1 with an added field and has a record
+    # without 001
+    records[1].add_field(pymarc.Field("599", [" ", " "], ["a", "Note"]))
+    records[3].remove_fields("001")
+    second = tmp_path / "second"
+    ph.write_to_file(records[1:], str(second), "xml")
+    return [str(first) + ".mrc", str(second) + ".xml"]
+
+
+@pytest.mark.parametrize("keep, expected", [
+    ("first", [False, False, False, False]),
+    ("last", [False, True, False, False]),
+    ("most-complete", [False, False, True, False]),
+])
+def test_merge_files(tmp_path, vendor_files, keep, expected):
+    outfile = str(tmp_path / "merged")
+    counts = merge_files(vendor_files, outfile, "bin", keep=keep)
+
+    assert counts["read"] == 6
+    assert counts["written"] == 4
+    assert counts["duplicates"] == 2
+    assert counts["without key"] == 1
+    assert [bool(rec["599"]) for rec in ph.iter_records(outfile + ".mrc")
+            ] == expected
+
+
+def test_dedupe_key():
+    record = ph.batch_to_list("tests/testdata/bindata_short.mrc")[0]
+
+    assert dedupe_key(record) == "990000141780203339"
+    assert dedupe_key(record, "035") == record["035"]["a"]
+    with pytest.raises(ValueError):
+        dedupe_key(record, "020")
@@ -0,0 +1,104 @@
+import pymarc
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers.pipeline import Pipeline
+
+
+def process_record_by_hand(rec):
+    for field in rec.get_fields("245", "264", "300"):
+        ph.remove_isbd(field)
+    for field in rec.get_fields("100", "700"):
+        ph.relator_terms_to_codes(field)
+    ph.language_041_from_008(rec)
+    ph.country_044_from_008(rec)
+    return rec
+
+
+def test_pipeline_matches_helpers():
+    pipeline = (Pipeline()
+                .add("remove_isbd", tags=("245", "264", "300"))
+                .add("relator_terms_to_codes", tags=("100", "700"))
+                .add("language_041_from_008")
+                .add("country_044_from_008"))
+    process_record = pipeline.compile()
+
+    expected = [
+        process_record_by_hand(rec)
+        for rec in ph.iter_records("tests/testdata/bindata_short.mrc")
+    ]
+    processed = [
+        process_record(rec)
+        for rec in ph.iter_records("tests/testdata/bindata_short.mrc")
+    ]
+
+    assert [rec.as_marc() for rec in processed
+            ] == [rec.as_marc() for rec in expected]
+    assert pipeline.records == 72
+    assert pipeline.calls["language_041_from_008"] == 72
+    assert "remove_isbd" in pipeline.report()
+
+
+def test_pipeline_skips_records_without_required_fields():
+    rec = pymarc.Record()
+    rec.add_field(
+        pymarc.Field(tag="245", indicators=["0", "0"], subfields=["a", "Titel /"]))
+    # translate_ill needs a 300, language_041_from_008 an 008
+    process_record = (Pipeline()
+                      .add("translate_ill")
+                      .add("language_041_from_008")
+                      .add("remove_isbd")
+                      .compile())
+
+    assert process_record(rec)["245"]["a"] == "Titel"
+    assert rec["041"] is None
+
+
+def test_pipeline_custom_steps():
+    seen = []
+    pipeline = Pipeline().add(lambda field: seen.append(field.tag),
+                              tags=("041", ),
+                              scope="field",
+                              name="collect")
+    list(pipeline.run(ph.iter_records("tests/testdata/bindata_short.mrc")))
+
+    assert len(seen) == 70
+    assert pipeline.calls["collect"] == 72
+
+    with pytest.raises(ValueError):
+        Pipeline().add(print, scope="field")
+    with pytest.raises(ValueError):
+        Pipeline().add("no_such_helper")
+
+
+def test_pipeline_uses_looked_up_fields():
+    from pymarc_helpers.generator import generate_records
+
+    def by_hand(rec):
+        ph.nonfiling_articles(rec["245"], rec["008"].data[35:38])
+        ph.language_041_from_008(rec)
+        ph.country_044_from_008(rec)
+        ph.translate_ill(rec)
+        return rec
+
+    process_record = (Pipeline()
+                      .add("nonfiling_articles")
+                      .add("language_041_from_008")
+                      .add("country_044_from_008")
+                      .add("translate_ill")
+                      .compile())
+
+    expected = [by_hand(rec) for rec in generate_records(300, seed=2)]
+    processed = [process_record(rec) for rec in generate_records(300, seed=2)]
+    assert [rec.as_marc() for rec in processed
+            ] == [rec.as_marc() for rec in expected]
+
+
+def test_pipeline_nonfiling_articles_language():
+    rec = pymarc.Record()
+    rec.add_field(
+        pymarc.Field(tag="008", data="200101s2020    au            000 0 eng d"),
+        pymarc.Field(tag="245", indicators=["1", "0"],
+                     subfields=["a", "Die hard"]))
+    Pipeline().add("nonfiling_articles").compile()(rec)
+    # "Die" is no English article
+    assert rec["245"]["a"] == "Die hard"
@@ -1,4 +1,7 @@
+import csv
+import json
 import pickle
+import re
 import pytest
 import pymarc_helpers as ph
 import pymarc
@@ -13,6 +16,171 @@ def test_batch_to_list():
     assert len(frombin) == 72
 
 
+def test_iter_records():
+    fromxml = ph.iter_records("tests/testdata/xmldata_short.xml")
+    frombin = ph.iter_records("tests/testdata/bindata_short.mrc")
+
+    # generators, not lists
+    assert not isinstance(fromxml, list)
+    first = next(frombin)
+    assert isinstance(first, pymarc.Record)
+    assert first["001"].data == "990000141780203339"
+    assert len(list(frombin)) == 71
+    assert len(list(fromxml)) == 72
+
+
+def test_iter_mmap_records(tmp_path):
+    infile = "tests/testdata/bindata_short.mrc"
+    with open(infile, "rb") as fh:
+        expected = list(ph.iter_raw_records(fh))
+
+    records = list(ph.iter_mmap_records(infile))
+    assert all(isinstance(raw, memoryview) for raw in records)
+    assert [bytes(raw) for raw in records] == expected
+    # adjacent regions yield every record once
+    for parts in (1, 2, 7, 100):
+        assert [
+            bytes(raw) for start, end in ph.file_regions(infile, parts)
+            for raw in ph.iter_mmap_records(infile, start, end)
+        ] == expected
+
+    # reading goes on after a record with a broken length
+    broken = tmp_path / "broken.mrc"
+    broken.write_bytes(expected[0] + b"xx" + expected[1][2:] + expected[2])
+    records = list(ph.iter_records(str(broken)))
+    assert [rec is None for rec in records] == [False, True, False]
+
+
+def test_iter_xml_records():
+    expected = pymarc.parse_xml_to_array("tests/testdata/xmldata_short.xml")
+    records = list(ph.iter_xml_records("tests/testdata/xmldata_short.xml"))
+
+    assert len(records) == 72
+    for record, expected_record in zip(records, expected):
+        assert record.leader == expected_record.leader
+        assert record.as_marc() == expected_record.as_marc()
+
+
+def test_chunked():
+    assert list(ph.chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(ph.chunked([], 2)) == []
+
+
+def test_control_number():
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+    assert ph.control_number(records[0]) == "990000141780203339"
+    assert ph.control_number(pymarc.Record()) is None
+
+
+def test_clone_record():
+    record = ph.batch_to_list("tests/testdata/bindata_short.mrc")[0]
+    original = record.as_marc()
+    clone = ph.clone_record(record)
+
+    assert clone.as_marc() == original
+    clone["245"]["a"] = "Changed title"
+    clone["245"].indicators[1] = "4"
+    clone["008"].data = "x" * 40
+    clone.add_field(pymarc.Field(tag="999", indicators=[" ", " "],
+                                 subfields=["a", "new"]))
+    assert record.as_marc() == original
+
+    # records built from scratch have a Leader object
+    new_record = pymarc.Record()
+    new_clone = ph.clone_record(new_record)
+    new_clone.leader[5] = "c"
+    assert new_record.leader[5] == " "
+
+
+def test_field_stats():
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+    stats = ph.FieldStats().update(records)
+
+    assert stats.records == 72
+    assert stats.fields["001"] == 72
+    assert stats.fields["24500"] == 72
+    assert stats.subfield_codes("24500") == {"a", "b", "c", "n", "p"}
+    assert stats.subfields["24500"]["a"] == 72
+    assert stats.subfield_codes("001") == set()
+
+    # statistics of chunks add up to the statistics of the whole batch
+    merged = ph.FieldStats().update(records[:30]).merge(
+        ph.FieldStats().update(records[30:]))
+    assert merged.records == stats.records
+    assert merged.fields == stats.fields
+    assert merged.subfields == stats.subfields
+
+
+def test_file_stats():
+    serial = ph.file_stats("tests/testdata/bindata_short.mrc")
+    parallel = ph.file_stats("tests/testdata/bindata_short.mrc",
+                             workers=2,
+                             regions=5)
+    fromxml = ph.file_stats("tests/testdata/xmldata_short.xml", workers=2)
+
+    for stats in (parallel, fromxml):
+        assert stats.records == serial.records
+        assert stats.fields == serial.fields
+        assert stats.subfields == serial.subfields
+
+
+def test_getstats(tmp_path):
+    outfile = tmp_path / "stats.txt"
+    ph.getstats(ph.iter_records("tests/testdata/bindata_short.mrc"),
+                str(outfile))
+    output = outfile.read_text(encoding="utf-8")
+
+    assert re.search(r"\| No. of records +\| 72 +\|", output)
+    assert "a: 72, b: 22, c: 66" in output
+
+
+def test_getstats_machine_readable(tmp_path):
+    stats = ph.file_stats("tests/testdata/bindata_short.mrc")
+
+    ph.getstats(stats, str(tmp_path / "stats.json"), form="json")
+    data = json.loads((tmp_path / "stats.json").read_text())
+    assert data["records"] == 72
+    assert data["bytes"] == 91263
+    assert data["records_per_second"] > 0
+    f245 = [field for field in data["fields"] if field["tag"] == "24500"][0]
+    assert f245["count"] == 72
+    assert f245["subfields"]["b"] == 22
+
+    ph.getstats(stats, str(tmp_path / "stats.csv"), form="csv")
+    with open(tmp_path / "stats.csv", newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    assert rows[0] == {"metric": "records", "tag": "", "subfield": "",
+                       "value": "72"}
+    assert {"metric": "subfield", "tag": "24500", "subfield": "b",
+            "value": "22"} in rows
+
+    with pytest.raises(ValueError):
+        ph.getstats(stats, form="yaml")
+
+
+@pytest.mark.parametrize("form", ["bin", "xml", "text"])
+def test_record_writer(tmp_path, form):
+    records = ph.batch_to_list("tests/testdata/bindata_short.mrc")
+    filename = str(tmp_path / "output")
+
+    # tiny buffer to force several flushes
+    with ph.RecordWriter(filename, form, buffer_size=1000) as writer:
+        writer.write_all(rec for rec in records)
+    assert writer.count == 72
+
+    if form == "text":
+        text = open(writer.filename, encoding="utf-8").read()
+        assert text.count("=LDR  ") == 72
+    else:
+        assert writer.filename.endswith(ph.RecordWriter.extensions[form])
+        written = ph.batch_to_list(writer.filename)
+        assert [rec.as_marc() for rec in written
+                ] == [rec.as_marc() for rec in records]
+
+    with pytest.raises(ValueError):
+        ph.RecordWriter(filename, "json")
+
+
 def test_change_control_data():
     pass
 
@@ -0,0 +1,45 @@
+import pymarc
+from pymarc_helpers.relators import RelatorResolver, normalize_term
+
+
+def test_normalize_term():
+    assert normalize_term(" Editor. ") == "editor"
+    assert normalize_term("[Übersetzer]") == "ubersetzer"
+    assert normalize_term("Hrsg.,") == "hrsg"
+    assert normalize_term("author of introduction,  etc.") == \
+        "author of introduction, etc"
+
+
+def test_resolve():
+    resolver = RelatorResolver()
+
+    assert resolver.resolve("author") == "aut"
+    assert resolver.resolve("Author.") == "aut"
+    assert resolver.resolve("Übers.") == "trl"
+    assert resolver.resolve("(Hrsg.)") == "edt"
+    assert resolver.resolve("aut") == "aut"
+    assert resolver.resolve("Author of introduction, etc.") == "aui"
+    assert resolver.resolve("10445599") is None
+    assert resolver.resolve("10445599") is None
+    assert resolver.unknown == {"10445599": 2}
+    assert "10445599" in resolver.report()
+
+
+def test_replace_terms():
+    resolver = RelatorResolver()
+    field = pymarc.Field(tag="700",
+                         indicators=["1", " "],
+                         subfields=[
+                             "a", "Mustermann, Martin", "e", "Hrsg.", "e",
+                             "Übersetzer", "e", "editor", "e", "Kaiser", "4",
+                             "trl"
+                         ])
+
+    resolver.replace_terms(field)
+
+    # every known $e is replaced, codes are not repeated, unknown terms stay
+    assert field.subfields == [
+        "a", "Mustermann, Martin", "e", "Kaiser", "4", "trl", "4", "edt"
+    ]
+    assert resolver.unknown == {"Kaiser": 1}
+    assert resolver.report() != RelatorResolver().report() == ""
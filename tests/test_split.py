@@ -0,0 +1,45 @@
+import array
+
+import pytest
+import pymarc_helpers as ph
+from pymarc_helpers.split import shard_bounds, split_file
+
+
+def test_shard_bounds():
+    offsets = array.array("Q", [0, 10, 20, 30, 130, 140, 150])
+
+    assert shard_bounds(offsets, 3) == [0, 2, 4, 6]
+    # the big record gets a shard of its own
+    assert shard_bounds(offsets, 3, "bytes") == [0, 3, 4, 6]
+    assert shard_bounds(offsets, 10) == list(range(7))
+    with pytest.raises(ValueError):
+        shard_bounds(offsets, 3, "size")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_split_binary(tmp_path, workers):
+    infile = "tests/testdata/bindata_short.mrc"
+    shards = split_file(infile, 5, str(tmp_path / "part"), "bin", "bytes",
+                        workers)
+
+    assert [filename for filename, _ in shards
+            ] == [str(tmp_path / f"part_00{i}.mrc") for i in range(5)]
+    assert sum(count for _, count in shards) == 72
+    with open(infile, "rb") as fh:
+        original = fh.read()
+    assert b"".join(open(filename, "rb").read()
+                    for filename, _ in shards) == original
+
+
+@pytest.mark.parametrize("infile", [
+    "tests/testdata/bindata_short.mrc", "tests/testdata/xmldata_short.xml"
+])
+def test_split_decoded(tmp_path, infile):
+    shards = split_file(infile, 4, str(tmp_path / "part"), "xml")
+
+    assert [count for _, count in shards] == [18, 18, 18, 18]
+    records = [
+        rec for filename, _ in shards for rec in ph.iter_records(filename)
+    ]
+    assert [rec.as_marc() for rec in records
+            ] == [rec.as_marc() for rec in ph.iter_records(infile)]